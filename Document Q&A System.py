@@ -1,14 +1,19 @@
 import streamlit as st
-from openai import OpenAI, OpenAIError
-import fitz  # PyMuPDF for reading PDFs
+from helpers.clients import verify_openai_key
+from helpers.doc_index import (DOC_QA_COLLECTION, DOC_QA_DB_PATH, ensure_indexed, retrieve_chunks,
+                               use_full_documents)
+from helpers.pdf import file_hash, open_pdf
+from helpers.providers import get_provider
+from helpers.vector_store import open_collection
 
 def read_pdf(file):
-    """Function to read PDF content using PyMuPDF (fitz)."""
-    document = ""
-    with fitz.open(stream=file.read(), filetype="pdf") as doc:
-        for page in doc:
-            document += page.get_text()
-    return document
+    """Function to read PDF content, extracted once per file hash (see helpers.pdf)."""
+    return open_pdf(file).text
+
+# Open the uploaded-documents vector DB once per process
+@st.cache_resource
+def load_vectordb(db_path=DOC_QA_DB_PATH):
+    return open_collection(db_path, DOC_QA_COLLECTION, metadata={"hnsw:space": "cosine"})
 
 # Show title and description.
 st.title("📄 Document Question Answering - Q&A")
@@ -22,71 +27,83 @@ openai_api_key = st.text_input("OpenAI API Key", type="password")
 
 # Validate API key as soon as it's entered.
 if openai_api_key:
-    try:
-        # Create an OpenAI client to validate the key.
-        client = OpenAI(api_key=openai_api_key)
-        # Try a simple API call to check if the key is valid
-        client.models.list()
+    # The shared client is reused and the check is cached across reruns
+    verified_client, is_valid, message = verify_openai_key(openai_api_key)
+    if is_valid:
+        client = verified_client
         st.success("API key is valid!", icon="✅")
-    except OpenAIError as e:
-        st.error(f"Invalid API key: {e}", icon="❌")
+    else:
+        st.error(f"Invalid API key: {message}", icon="❌")
 else:
     st.info("Please add your OpenAI API key to continue.", icon="🗝️")
 
 # Proceed if API key is provided and valid
 if openai_api_key and 'client' in locals():
-    # Let the user upload a file via `st.file_uploader`.
-    uploaded_file = st.file_uploader(
-        "Upload a document (.txt or .pdf)", type=("txt", "pdf")
+    # Let the user upload files via `st.file_uploader`.
+    uploaded_files = st.file_uploader(
+        "Upload documents (.txt or .pdf)", type=("txt", "pdf"), accept_multiple_files=True
     )
 
-    # Initialize document variable
-    document = None
-
-    # Check if a file is uploaded
-    if uploaded_file:
+    # Read the uploaded files based on their type
+    documents = []
+    for uploaded_file in uploaded_files or []:
         file_extension = uploaded_file.name.split('.')[-1].lower()
-
-        # Read the uploaded file based on its type
         if file_extension == 'txt':
-            document = uploaded_file.read().decode()
+            text = uploaded_file.getvalue().decode()
         elif file_extension == 'pdf':
-            document = read_pdf(uploaded_file)
+            text = read_pdf(uploaded_file)
         else:
-            st.error("Unsupported file type.")
+            st.error(f"Unsupported file type: {uploaded_file.name}")
+            continue
+        if text:
+            documents.append({"name": uploaded_file.name, "digest": file_hash(uploaded_file), "text": text})
 
-        # Check if the document is loaded successfully
-        if document:
-            # Ask the user for a question via `st.text_area`.
-            question = st.text_area(
-                "Now ask a question about the document!",
-                placeholder="Can you give me a short summary?",
-                disabled=False,
-            )
+    # Check if the documents are loaded successfully
+    if documents:
+        # Small uploads are sent in full; larger ones are chunked and embedded
+        # once per file hash and answered from the closest chunks
+        token_counts = st.session_state.setdefault('token_counts', {})
+        full_documents = use_full_documents([doc["text"] for doc in documents], cache=token_counts)
+        if not full_documents:
+            collection = load_vectordb()
+            with st.spinner("Indexing documents..."):
+                for doc in documents:
+                    ensure_indexed(collection, client, doc["digest"], doc["name"], doc["text"])
 
-            if question:
-                # Process the uploaded file and question.
+        # Ask the user for a question via `st.text_area`.
+        question = st.text_area(
+            "Now ask a question about the documents!",
+            placeholder="Can you give me a short summary?",
+            disabled=False,
+        )
+
+        if question:
+            try:
+                if full_documents:
+                    if len(documents) == 1:
+                        intro, context = "Here's a document", documents[0]["text"]
+                    else:
+                        intro = "Here are the documents"
+                        context = "\n\n".join(f"{doc['name']}:\n{doc['text']}" for doc in documents)
+                else:
+                    chunks = retrieve_chunks(collection, client, question, [doc["digest"] for doc in documents])
+                    context = "\n\n".join(f"[{name}] {text}" for name, text in chunks)
+                    intro = "Here are the passages of the documents most relevant to the question"
+
+                # Process the uploaded files and question.
                 messages = [
                     {
                         "role": "user",
-                        "content": f"Here's a document: {document} \n\n---\n\n {question}",
+                        "content": f"{intro}: {context} \n\n---\n\n {question}",
                     }
                 ]
 
-                try:
-                    # Generate an answer using the OpenAI API.
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=messages,
-                        stream=True,
-                    )
-
-                    # Stream the response to the app using `st.write`.
-                    st.write_stream(response)
-                except OpenAIError as e:
-                    st.error(f"An error occurred while generating a response: {e}", icon="❌")
+                # Generate an answer using the OpenAI API.
+                stream = get_provider("OpenAI", openai_api_key, "gpt-4o-mini").stream(messages)
 
-    # Reset document if the file is removed
-    if not uploaded_file:
-        document = None
+                # Stream the response to the app using `st.write`.
+                st.write_stream(chunk.text for chunk in stream)
+            except Exception as e:
+                st.error(f"An error occurred while generating a response: {e}", icon="❌")
+    else:
         st.info("Please upload a document to continue.", icon="📄")
@@ -1,17 +1,17 @@
 import streamlit as st
 import requests
-from bs4 import BeautifulSoup  # For extracting webpage content
-from openai import OpenAI, OpenAIError
-import cohere
-from mistralai import Mistral
+from helpers.fetch import fetch_text
+from helpers.clients import verify_cohere_key, verify_mistral_key, verify_openai_key
+from helpers.providers import get_provider
+from helpers.summarize import (LANGUAGE_INSTRUCTIONS, SUMMARY_OPTIONS, generate_summary, is_long_document,
+                                reduce_summary, summarize_sections, summary_instruction_for)
+from helpers.summary_cache import document_hash, get_summary_cache, summary_key
 
 # Function to read webpage content from a URL
 def read_webpage_from_url(url):
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
-        document = " ".join([p.get_text() for p in soup.find_all("p")])
+        # Served from the on-disk cache, revalidated with a conditional GET when stale
+        document = fetch_text(url)
         return document
     except requests.RequestException as e:
         st.error(f"Error reading webpage from {url}: {e}")
@@ -20,95 +20,6 @@ def read_webpage_from_url(url):
         st.error(f"Error processing the webpage: {e}")
         return None
 
-# Function to verify OpenAI API key
-def verify_openai_key(api_key):
-    try:
-        client = OpenAI(api_key=api_key)
-        client.models.list()
-        return client, True, "API key is valid"
-    except OpenAIError as e:
-        return None, False, str(e)
-
-# Function to verify Cohere API key
-def verify_cohere_key(api_key):
-    try:
-        client = cohere.Client(api_key)
-        client.generate(prompt="Hello", max_tokens=5)
-        return client, True, "API key is valid"
-    except Exception as e:
-        return None, False, str(e)
-
-# Function to verify Mistral API key
-def verify_mistral_key(api_key):
-    client = Mistral(api_key=api_key)
-    try:
-        response = client.chat.complete(
-            model="mistral-large-latest",
-            messages=[{"role": "user", "content": "Test message"}]
-        )
-        if response.choices:
-            return client, True, "API key is valid"
-        else:
-            return None, False, "API key is invalid or no response received"
-    except Exception as e:
-        return None, False, str(e)
-
-# Function to generate summary using OpenAI
-def generate_openai_summary(client, document, summary_instruction, language_instruction, use_advanced_model):
-    model_choice = "gpt-4o" if use_advanced_model else "gpt-4o-mini"
-    messages = [
-        {
-            "role": "user",
-            "content": f"Here's a document: {document} \n\n---\n\n {summary_instruction} {language_instruction}",
-        }
-    ]
-    try:
-        stream = client.chat.completions.create(
-            model=model_choice,
-            messages=messages,
-            stream=True,
-        )
-        return stream
-    except OpenAIError as e:
-        st.error(f"Error generating summary: {e}", icon="❌")
-        return None
-
-# Function to generate summary using Cohere
-def generate_cohere_summary(client, document, summary_instruction, language_instruction):
-    prompt = f"{language_instruction} {summary_instruction} \n\n\n---\n\n Document: {document}\n\n---\n\n"
-    try:
-        events = client.chat_stream(
-            model='command-r',
-            message=prompt,
-            temperature=0,       
-            max_tokens=1500,
-            prompt_truncation='AUTO',
-            connectors=[],
-            documents=[]
-        )
-        return events
-    except Exception as e:
-        st.error(f"Error generating summary: {e}", icon="❌")
-        return None
-
-# Function to generate summary using Mistral
-def generate_mistral_summary(client, document, summary_instruction, language_instruction):
-    prompt = f"{language_instruction} {summary_instruction} \n\n\n---\n\n Document: {document}\n\n---\n\n"
-    try:
-        chat_response = client.chat.complete(
-            model="mistral-large-latest",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ]
-        )
-        return chat_response.choices[0].message.content
-    except Exception as e:
-        st.error(f"Error generating summary: {e}", icon="❌")
-        return None
-
 # Streamlit app
 st.title("📄 Multi-LLM Webpage Summarizer from URL")
 st.write("Enter a webpage URL, select your LLM provider, and choose summary options.")
@@ -141,11 +52,7 @@ else:
 st.sidebar.header("Summary Options")
 summary_option = st.sidebar.radio(
     "Choose how you would like the document to be summarized:",
-    options=[
-        "Summarize the document in 100 words",
-        "Summarize the document in 2 connecting paragraphs",
-        "Summarize the document in 5 bullet points"
-    ]
+    options=SUMMARY_OPTIONS
 )
 
 # Language selection
@@ -159,6 +66,14 @@ use_advanced_model = False
 if llm_provider == "OpenAI":
     use_advanced_model = st.sidebar.checkbox("Use Advanced Model (GPT-4O)")
 
+# Provider adapter for the chosen LLM
+if llm_provider == "OpenAI":
+    provider = get_provider("OpenAI", openai_api_key, "gpt-4o" if use_advanced_model else "gpt-4o-mini")
+elif llm_provider == "Cohere":
+    provider = get_provider("Cohere", cohere_api_key)
+else:  # Mistral
+    provider = get_provider("Mistral", mistral_api_key)
+
 # Webpage URL input
 url = st.text_input("Enter the URL to the webpage:")
 
@@ -170,30 +85,40 @@ if url:
         start_time = time.time()
 
         # Prepare summary and language instructions
-        summary_instruction = summary_option.replace("Summarize the document", "Summarize this document")
-        language_instruction = {
-            "English": "Please summarize the document in English.",
-            "French": "Veuillez résumer le document en français.",
-            "Spanish": "Por favor, resuma el documento en español."
-        }[language_option]
-
-        # Generate summary based on selected LLM provider
-        if llm_provider == "OpenAI":
-            stream = generate_openai_summary(client, document, summary_instruction, language_instruction, use_advanced_model)
-            if stream:
-                st.write_stream(stream)
-        elif llm_provider == "Cohere":
-            events = generate_cohere_summary(client, document, summary_instruction, language_instruction)
-            if events:
-                response_text = ""
-                for event in events:
-                    if event.event_type == "text-generation":
-                        response_text += str(event.text)
-                st.write(response_text)
-        else:  # Mistral
-            summary = generate_mistral_summary(client, document, summary_instruction, language_instruction)
-            if summary:
-                st.write(summary)
+        summary_instruction = summary_instruction_for(summary_option)
+        language_instruction = LANGUAGE_INSTRUCTIONS[language_option]
+
+        # Finished summaries are cached per document, model and options, so
+        # reruns and repeated views of a page don't call the LLM again
+        summary_cache = get_summary_cache()
+        cache_key = summary_key(document_hash(document), llm_provider, provider.model, summary_option, language_option)
+        cached = summary_cache.get(cache_key)
+
+        sections = []
+        stream = None
+        if cached:
+            st.markdown(cached["summary"])
+        else:
+            # Long pages are summarized section by section first, then the
+            # section notes are reduced into the requested summary
+            try:
+                if is_long_document(document):
+                    with st.spinner("Summarizing a long page section by section..."):
+                        sections = summarize_sections(provider, document)
+                    stream = reduce_summary(provider, [section.text for section in sections],
+                                            summary_instruction, language_instruction)
+                else:
+                    stream = generate_summary(provider, document, summary_instruction, language_instruction)
+                # Stream the summary from the selected LLM provider
+                st.write_stream(chunk.text for chunk in stream)
+                usage = {name: sum((part.usage.get(name) or 0) for part in [*sections, stream])
+                         for name in ("prompt_tokens", "completion_tokens")}
+                if stream.text:
+                    summary_cache.put(cache_key, stream.text, latency=time.time() - start_time,
+                                      time_to_first_token=stream.time_to_first_token, usage=usage,
+                                      mode="map-reduce" if sections else "single")
+            except Exception as e:
+                st.error(f"Error generating summary: {e}", icon="❌")
 
         # Measure time and estimate cost (time is just an example; cost would depend on API usage)
         end_time = time.time()
@@ -201,8 +126,28 @@ if url:
 
         # Display performance evaluation at the bottom of the sidebar
         with st.sidebar.expander("Performance Evaluation"):
-            st.write(f"Model: {llm_provider}")
+            st.write(f"Model: {llm_provider} ({provider.model})")
             st.write(f"Time taken: {time_taken} seconds")
+            if cached:
+                st.write(f"Served from cache (originally {cached['latency']:.2f} seconds, "
+                         f"{cached['prompt_tokens']} prompt and {cached['completion_tokens']} completion tokens, "
+                         f"{cached['mode']} mode)")
+            if sections:
+                st.write(f"Mode: map-reduce over {len(sections)} sections")
+                section_usage = [section.usage for section in sections if section.usage]
+                if section_usage:
+                    st.write(f"Section tokens: {sum(u.get('prompt_tokens') or 0 for u in section_usage)} prompt, "
+                             f"{sum(u.get('completion_tokens') or 0 for u in section_usage)} completion")
+            if stream and stream.time_to_first_token is not None:
+                st.write(f"Time to first token: {stream.time_to_first_token:.2f} seconds")
+            if stream and stream.total_latency is not None:
+                st.write(f"Generation time: {stream.total_latency:.2f} seconds")
+            if stream and stream.usage:
+                st.write(f"Tokens: {stream.usage.get('prompt_tokens')} prompt, "
+                         f"{stream.usage.get('completion_tokens')} completion")
+            cache_stats = summary_cache.stats()
+            st.caption(f"Summary cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                       f"{cache_stats['entries']} stored")
 
 else:
     st.info("Please enter a valid webpage URL to generate a summary.", icon="🌐")
@@ -1,105 +1,78 @@
 import streamlit as st
-from openai import OpenAI
 import os
-import chromadb
-import pandas as pd
-from datetime import datetime
-
-# Function to verify OpenAI API key
-def verify_openai_key(api_key):
-    try:
-        client = OpenAI(api_key=api_key)
-        client.models.list()
-        return client, True, "API key is valid"
-    except Exception as e:
-        return None, False, str(e)
-
-# Vector DB functions
-def add_to_collection(collection, text, url, date):
-    openai_client = OpenAI(api_key=st.secrets['key1'])
-    response = openai_client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
+from datetime import date, datetime, timedelta
+from helpers.embedding_cache import get_embedding_cache
+from helpers.vector_store import VECTOR_STORE, open_collection
+from helpers.news import (NEWS_RECENCY_HALF_LIFE_DAYS, hybrid_search, load_news_bm25, news_facets, news_filter,
+                          sync_news_collection)
+from helpers.query_profiles import QUERY_PROFILES, get_profile_results
+from helpers.clients import get_openai_client, verify_openai_key
+
+# Open the vector DB once per process and sync it with the news CSV
+@st.cache_resource(show_spinner="Syncing vector DB with the news CSV...")
+def load_vectordb(db_path="News_Bot_VectorDB"):
+    # numpy or Chroma, depending on the VECTOR_STORE setting
+    collection = open_collection(
+        db_path,
+        "NewsBotCollection",
+        metadata={"hnsw:space": "cosine", "hnsw:M": 32}
     )
-    embedding = response.data[0].embedding
-    collection.add(
-        documents=[text],
-        ids=[url],  # Store URL as the ID
-        embeddings=[embedding],
-        metadatas=[{"date": date}]
-    )
-    return collection
+    # Only new or changed rows are embedded; removed rows are deleted
+    openai_client = get_openai_client(st.secrets['key1'])
+    # The sync checkpoint lives with the vectors, so a wiped DB or another backend starts over
+    checkpoint_path = os.path.join(db_path, f"news_sync.{VECTOR_STORE}.json")
+    stats = sync_news_collection(collection, openai_client, checkpoint_path=checkpoint_path)
+    # Precompute the stored profile results, from scratch if the news changed
+    for name in QUERY_PROFILES:
+        get_profile_results(collection, openai_client, name, refresh=bool(stats["changed"] or stats["removed"]))
+    return collection, stats
 
 def setup_vectordb():
-    db_path = "News_Bot_VectorDB"
-    
-    if not os.path.exists(db_path):
-        st.info("Setting up vector DB for the first time...")
-        client = chromadb.PersistentClient(path=db_path)
-        collection = client.get_or_create_collection(
-            name="NewsBotCollection",
-            metadata={"hnsw:space": "cosine", "hnsw:M": 32}
+    collection, stats = load_vectordb()
+    st.session_state.News_Bot_VectorDB = collection
+    if stats["changed"] or stats["removed"]:
+        st.success(
+            f"VectorDB synced: {stats['changed']} news articles added or updated, "
+            f"{stats['removed']} removed, {stats['unchanged']} unchanged, {stats['duplicates']} duplicate URLs skipped "
+            f"({stats['ingest']['docs_per_sec']:.1f} docs/sec)"
         )
-        
-        # Load the CSV file containing news URLs
-        news_df = pd.read_csv("HWs/Example_news_info_for_testing.csv")
-        for _, row in news_df.iterrows():
-            text = row['Document']
-            url = row['URL']
-            date = row['Date'] 
-            add_to_collection(collection, text, url, date)  # Add document and URL to the collection
-        
-        st.success(f"VectorDB setup complete with {len(news_df)} news articles!")
     else:
-        st.info("VectorDB already exists. Loading from disk...")
-        client = chromadb.PersistentClient(path=db_path)
-        st.session_state.News_Bot_VectorDB = client.get_collection(name="NewsBotCollection")
+        st.info(f"VectorDB is up to date with {stats['unchanged']} news articles.")
 
 def find_most_interesting_news():
-    keywords = ["legal", "lawsuit", "regulation", "merger", "acquisition", "court", "law", "contract", "legal precedent", "jurisdiction", "statutory", "litigation",
-    "regulatory compliance", "intellectual property", "antitrust",]
-
-    # Generate embeddings for keywords
-    openai_client = OpenAI(api_key=st.secrets['key1'])
-    keyword_embeddings = []
-    for keyword in keywords:
-        response = openai_client.embeddings.create(
-            input=keyword,
-            model="text-embedding-3-small"
-        )
-        keyword_embeddings.append(response.data[0].embedding)
-    combined_embedding = [sum(x) / len(x) for x in zip(*keyword_embeddings)]
-
     if 'News_Bot_VectorDB' in st.session_state:
         collection = st.session_state.News_Bot_VectorDB
-        
-        # Retrieve documents using combined keyword embeddings
-        results = collection.query(
-            query_embeddings=[combined_embedding],
-            include=['documents', 'metadatas'],
-            n_results=3  # Adjust this number as needed
-        )
+        openai_client = get_openai_client(st.secrets['key1'])
+
+        # Retrieve documents close to the centroid of the legal keywords; both
+        # the centroid and the results are stored and reused
+        results = get_profile_results(collection, openai_client, "legal", n_results=3)
         return results
     else:
         st.error("VectorDB not set up. Please set up the VectorDB first.")
         return None
 
-def search_vectordb(topic):
-    # Search functionality using topic keywords
-    openai_client = OpenAI(api_key=st.secrets['key1'])
-    response = openai_client.embeddings.create(
-        input=topic,
-        model="text-embedding-3-small"
-    )
-    embedding = response.data[0].embedding
+# Load the keyword index once per process; it is rebuilt only when the CSV changes
+@st.cache_resource(show_spinner="Loading the news keyword index...")
+def load_keyword_index():
+    return load_news_bm25()
 
+# Companies and date range of the news, for the search filters
+@st.cache_data
+def load_news_facets():
+    return news_facets()
+
+NEWS_EPOCH = date(2000, 1, 1)
+
+def search_vectordb(topic, where=None, half_life_days=NEWS_RECENCY_HALF_LIFE_DAYS):
+    # Search functionality using topic keywords and embeddings, fused by rank;
+    # the filters run inside the index and recent news scores higher
     if 'News_Bot_VectorDB' in st.session_state:
         collection = st.session_state.News_Bot_VectorDB
-        results = collection.query(
-            query_embeddings=[embedding],
-            include=['documents', 'metadatas'],
-            n_results=3  # Adjust this number as needed
-        )
+        openai_client = get_openai_client(st.secrets['key1'])
+        results, mode = hybrid_search(collection, openai_client, load_keyword_index(), topic, k=3,
+                                      where=where, half_life_days=half_life_days)
+        st.caption("Keyword match (no embedding call)" if mode == "keyword" else "Keyword and semantic match")
         return results
     else:
         st.error("VectorDB not set up. Please set up the VectorDB first.")
@@ -129,6 +102,13 @@ else:
 # Set up VectorDB
 setup_vectordb()
 
+# Embedding cache statistics
+cache_stats = get_embedding_cache().stats()
+st.sidebar.caption(
+    f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+    f"{cache_stats['entries']} vectors stored"
+)
+
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state['messages'] = []
@@ -153,15 +133,29 @@ if option == "Interesting News":
 
 elif option == "Find News About a Topic":
     topic = st.text_input("Enter a topic to find news about:")
+    facets = load_news_facets()
+    company = st.selectbox("Company", ["Any company", *facets["companies"]])
+    first_date = NEWS_EPOCH + timedelta(days=facets["first_day"])
+    last_date = NEWS_EPOCH + timedelta(days=facets["last_day"])
+    date_range = st.date_input("Published between", (first_date, last_date),
+                               min_value=first_date, max_value=last_date)
+    half_life_days = st.slider("Recency half-life (days, 0 = ignore age)", 0, 365, NEWS_RECENCY_HALF_LIFE_DAYS)
     if st.button("Search"):
         if topic:
             st.subheader(f"Searching for news articles about '{topic}'...")
-            results = search_vectordb(topic)
-            if results:
-                sorted_results = sort_results_by_date(results)
+            start_date, end_date = date_range if len(date_range) == 2 else (date_range[0], last_date)
+            where = news_filter(
+                company=None if company == "Any company" else company,
+                start_day=(start_date - NEWS_EPOCH).days if start_date > first_date else None,
+                end_day=(end_date - NEWS_EPOCH).days if end_date < last_date else None,
+            )
+            results = search_vectordb(topic, where=where, half_life_days=half_life_days)
+            if results and results["ids"][0]:
+                # Already ranked by relevance and recency together
                 formatted_results = [
-                    f"{i + 1}. {document}... (Published on {date}) - [Link]({url})"
-                    for i, (date, document, url) in enumerate(sorted_results)
+                    f"{i + 1}. {document}... (Published on {metadata.get('date', 'Unknown Date')}) - [Link]({url})"
+                    for i, (document, metadata, url) in enumerate(
+                        zip(results["documents"][0], results["metadatas"][0], results["ids"][0]))
                 ]
                 response_content = "Here are the news articles:\n" + "\n".join(formatted_results)
                 st.markdown(response_content)
@@ -1,25 +1,23 @@
 import streamlit as st
-from openai import OpenAI
-import os
 from PyPDF2 import PdfReader
-__import__('pysqlite3')
-import sys
-sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
-import chromadb
-import cohere
 import requests
-from bs4 import BeautifulSoup
-import tiktoken
-import google.generativeai as genai
+from helpers.embedding_cache import get_embedding_cache
+from helpers.vector_store import open_collection
+from helpers.chunking import query_chunks
+from helpers.embeddings import embed_text
+from helpers.su_orgs import sync_su_orgs_collection
+from helpers.tokens import truncate_messages_by_tokens
+from helpers.memory import RollingSummary
+from helpers.providers import get_provider, write_stream
+from helpers.fetch import fetch_text
+from helpers.clients import get_openai_client, verify_cohere_key, verify_gemini_key, verify_openai_key
 
 
 # Function to read webpage content from a URL
 def read_webpage_from_url(url):
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
-        document = " ".join([p.get_text() for p in soup.find_all("p")])
+        # Served from the on-disk cache, revalidated with a conditional GET when stale
+        document = fetch_text(url)
         return document
     except requests.RequestException as e:
         st.error(f"Error reading webpage from {url}: {e}")
@@ -28,198 +26,43 @@ def read_webpage_from_url(url):
         st.error(f"Error processing the webpage: {e}")
         return None
 
-# Function to calculate tokens
-def calculate_tokens(messages):
-    """Calculate total tokens for a list of messages."""
-    total_tokens = 0
-    encoding = tiktoken.encoding_for_model('gpt-4o-mini')
-    for msg in messages:
-        total_tokens += len(encoding.encode(msg['content']))
-    return total_tokens
-
-def truncate_messages_by_tokens(messages, max_tokens):
-    """Truncate the message buffer to ensure it stays within max_tokens."""
-    total_tokens = calculate_tokens(messages)
-    while total_tokens > max_tokens and len(messages) > 1:
-        messages.pop(0)
-        total_tokens = calculate_tokens(messages)
-    return messages
-
-# Function to verify OpenAI API key
-def verify_openai_key(api_key):
-    try:
-        client = OpenAI(api_key=api_key)
-        client.models.list()
-        return client, True, "API key is valid"
-    except Exception as e:
-        return None, False, str(e)
-
-# Function to generate summary using OpenAI
-def generate_openai_response(client, messages, model):
-    try:
-        stream = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            stream=True,
-        )
-        return stream
-    except Exception as e:
-        st.error(f"Error generating response: {e}", icon="❌")
-        return None
-
-def verify_cohere_key(api_key):
-    try:
-        client = cohere.Client(api_key)
-        client.generate(prompt="Hello", max_tokens=5)
-        return client, True, "API key is valid"
-    except Exception as e:
-        return None, False, str(e)
-
-# Function to generate response using Cohere
-def generate_cohere_response(client, messages):
-    try:
-        stream = client.chat_stream(
-            model='command-r',
-            message=messages[-1]['content'],
-            chat_history=[{"role": m['role'], "message": m['content']} for m in messages[:-1]],
-            temperature=0,       
-            max_tokens=1500
-        )
-        return stream
-    except Exception as e:
-        st.error(f"Error generating response: {e}", icon="❌")
-        return None
-
-# Function to verify Gemini API key
-def verify_gemini_key(api_key):
-    try:
-        # Configure the API key
-        genai.configure(api_key=api_key)
-        client = genai.GenerativeModel('gemini-pro')
-        return client, True, "API key is valid"
-    except Exception as e:
-        return None, False, str(e)
-
-def generate_gemini_response(client, messages, prompt):
-    try:
-        msgs = []
-        for msg in messages:
-            role = "user" if msg["role"] == "user" else "model"
-            msgs.append({"role": role, "parts": msg["content"]})
-        response = client.generate_content(
-            contents=[*msgs, {"role": "user", "parts": [{"text": prompt}]}],
-            generation_config=genai.types.GenerationConfig(
-                temperature=0,
-                max_output_tokens=1500,
-            ),
-            stream=True
-        )
-        return response
-    except Exception as e:
-        return None
-
-def generate_conversation_summary(client, messages, llm_provider):
-    if llm_provider == 'Gemini':
-        msgs = []
-        for msg in messages:
-            role = "user" if msg["role"] == "user" else "model"
-            msgs.append({"role": role, "parts": [{"text": msg["content"]}]})
-        prompt = {"role": "user", "parts": [{"text": "Summarize the key points of this conversation concisely:"}]}
-        response = client.generate_content(
-            contents=[prompt, *msgs],
-            generation_config=genai.types.GenerationConfig(
-                temperature=0,
-                max_output_tokens=150,
-            ),
-        )
-        return response.text
-    elif "OpenAI" in llm_provider:
-        summary_prompt = "Summarize the key points of this conversation concisely:"
-        for msg in messages:
-            summary_prompt += f"\n{msg['role']}: {msg['content']}"
-        response = client.chat.completions.create(
-            model="gpt-4-mini" if llm_provider == "OpenAI GPT-4O-Mini" else "gpt-4",
-            messages=[{"role": "user", "content": summary_prompt}],
-            max_tokens=150
-        )
-        return response.choices[0].message.content
-    else:  # Cohere
-        summary_prompt = "Summarize the key points of this conversation concisely:"
-        chat_history = []
-        for msg in messages:
-            chat_history.append({"role": msg['role'], "message": msg['content']})
-            summary_prompt += f"\n{msg['role']}: {msg['content']}"
-        response = client.chat(
-            model='command-r',
-            message=summary_prompt,
-            chat_history=chat_history,
-            temperature=0,       
-            max_tokens=150
-        )
-        return response.text
-
 # Vector DB functions
-def add_to_collection(collection, text, filename):
-    openai_client = OpenAI(api_key = st.secrets['key1'])
-    response = openai_client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
-    )
-    embedding = response.data[0].embedding
-    collection.add(
-        documents=[text],
-        ids=[filename],
-        embeddings=[embedding]
+# Open the vector DB once per process and sync it with the su_orgs pages
+@st.cache_resource(show_spinner="Syncing vector DB with the su_orgs pages...")
+def load_vectordb(db_path="HW4_VectorDB"):
+    # numpy or Chroma, depending on the VECTOR_STORE setting
+    collection = open_collection(
+        db_path,
+        "HW4Collection",
+        metadata={"hnsw:space": "cosine", "hnsw:M": 32}
     )
-    return collection
+    # Only new or changed pages are embedded; removed pages are deleted
+    openai_client = get_openai_client(st.secrets['key1'])
+    stats = sync_su_orgs_collection(collection, openai_client)
+    return collection, stats
 
 def setup_vectordb():
-    db_path = "HW4_VectorDB"
-    
-    # Check if vector DB exists on disk
-    if not os.path.exists(db_path):
-        st.info("Setting up vector DB for the first time...")
-        
-        # Initialize the ChromaDB client with persistence
-        client = chromadb.PersistentClient(path=db_path)
-        
-        # Create or get the collection
-        collection = client.get_or_create_collection(
-            name="HW4Collection",
-            metadata={"hnsw:space": "cosine", "hnsw:M": 32}
+    collection, stats = load_vectordb()
+    st.session_state.HW4_vectorDB = collection
+    if stats["changed"] or stats["removed"]:
+        # Only pages without embedded JSON have template text to strip
+        stripped = (f", {stats['boilerplate_tokens']} template tokens stripped, {stats['tokens']} kept"
+                    if stats['boilerplate_tokens'] else "")
+        st.success(
+            f"VectorDB synced: {stats['changed']} HTML files added or updated, "
+            f"{stats['removed']} removed, {stats['unchanged']} unchanged "
+            f"({stats['ingest']['docs_per_sec']:.1f} docs/sec{stripped})"
         )
-        
-        su_orgs_path = os.path.join(os.getcwd(), "HWs/su_orgs/")
-        html_files = [f for f in os.listdir(su_orgs_path) if f.endswith('.html')]
-        
-        for html_file in html_files:
-            file_path = os.path.join(su_orgs_path, html_file)
-            with open(file_path, 'r', encoding='utf-8') as file:
-                soup = BeautifulSoup(file, 'html.parser')
-                text = soup.get_text(separator=' ', strip=True)
-                collection = add_to_collection(collection, text, html_file)
-        
-        st.success(f"VectorDB setup complete with {len(html_files)} HTML files!")
     else:
-        # If it already exists, just load it
-        st.info("VectorDB already exists. Loading from disk...")
-        client = chromadb.PersistentClient(path=db_path)
-        st.session_state.HW4_vectorDB = client.get_collection(name="HW4Collection")
+        st.info(f"VectorDB is up to date with {stats['unchanged']} HTML files.")
 
-def query_vectordb(query, k=3):
+def query_vectordb(query, k=3, collapse=True):
     if 'HW4_vectorDB' in st.session_state:
         collection = st.session_state.HW4_vectorDB
-        openai_client = OpenAI(api_key = st.secrets['key1'])
-        response = openai_client.embeddings.create(
-            input=query,
-            model="text-embedding-3-small"
-        )
-        query_embedding = response.data[0].embedding
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            include=['documents', 'distances', 'metadatas'],
-            n_results=k
-        )
+        openai_client = get_openai_client(st.secrets['key1'])
+        query_embedding = embed_text(openai_client, query)
+        # Retrieve the best chunks, merged per organization page
+        results = query_chunks(collection, query_embedding, k=k, collapse=collapse)
         return results
     else:
         st.error("VectorDB not set up. Please set up the VectorDB first.")
@@ -230,6 +73,13 @@ st.title("iSchool Student Organizations Chatbot")
 # Set up VectorDB
 setup_vectordb()
 
+# Embedding cache statistics
+cache_stats = get_embedding_cache().stats()
+st.sidebar.caption(
+    f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+    f"{cache_stats['entries']} vectors stored"
+)
+
 # Sidebar: LLM provider selection
 st.sidebar.header("LLM Provider")
 llm_provider = st.sidebar.selectbox(
@@ -249,12 +99,15 @@ if "OpenAI" in llm_provider:
     openai_api_key = st.secrets['key1']
     client, is_valid, message = verify_openai_key(openai_api_key)
     model = "gpt-4o-mini" if llm_provider == "OpenAI GPT-4O-Mini" else "gpt-4o"
+    provider = get_provider("OpenAI", openai_api_key, model)
 elif "Cohere" in llm_provider:
     cohere_api_key = st.secrets['cohere_key']
     client, is_valid, message = verify_cohere_key(cohere_api_key)
+    provider = get_provider("Cohere", cohere_api_key)
 else:
     gemini_api_key = st.secrets['gemini_key']
     client, is_valid, message = verify_gemini_key(gemini_api_key)
+    provider = get_provider("Gemini", gemini_api_key)
 
 if is_valid:
     st.sidebar.success(f"{llm_provider} API key is valid!", icon="✅")
@@ -294,43 +147,28 @@ if prompt := st.chat_input("What would you like to know about iSchool student or
     if memory_type == "Buffer of 5 questions":
         messages_for_llm = messages_for_llm[-11:]  # System message + last 5 Q&A pairs
     elif memory_type == "Conversation summary":
-        if 'conversation_summary' not in st.session_state:
-            st.session_state.conversation_summary = ""
-        st.session_state.conversation_summary = generate_conversation_summary(client, messages_for_llm, llm_provider)
-        messages_for_llm = [
-            context_message,
-            {"role": "system", "content": f"Conversation summary: {st.session_state.conversation_summary}"},
-            st.session_state.messages[-1]
-        ]
+        # The summary is folded in the background after each answer; messages
+        # it doesn't cover yet are sent as they are
+        memory = st.session_state.setdefault('conversation_memory', RollingSummary())
+        summary, recent_messages = memory.context(st.session_state.messages)
+        summary_message = [{"role": "system", "content": f"Conversation summary: {summary}"}] if summary else []
+        messages_for_llm = [context_message, *summary_message, *recent_messages]
     else:
-        messages_for_llm = truncate_messages_by_tokens(messages_for_llm, 5000)
+        # Token counts are cached per message for the whole session
+        token_counts = st.session_state.setdefault('token_counts', {})
+        messages_for_llm = truncate_messages_by_tokens(messages_for_llm, 5000, cache=token_counts)
 
     with st.chat_message("system"):
         message_placeholder = st.empty()
         full_response = ""
-        if "OpenAI" in llm_provider:
-            stream = generate_openai_response(client, messages_for_llm, model)
-            if stream:
-                for chunk in stream:
-                    if chunk.choices[0].delta.content is not None:
-                        full_response += chunk.choices[0].delta.content
-                        message_placeholder.markdown(full_response + "▌")
-                message_placeholder.markdown(full_response)
-        elif "Cohere" in llm_provider:
-            stream = generate_cohere_response(client, messages_for_llm)
-            if stream:
-                for event in stream:
-                    if event.event_type == "text-generation":
-                        full_response += event.text
-                        message_placeholder.markdown(full_response + "▌")
-                message_placeholder.markdown(full_response)
-        else:  # Gemini
-            response = generate_gemini_response(client, messages_for_llm, prompt)
-            if response:
-                for chunk in response:
-                    if chunk.text:
-                        full_response += chunk.text
-                        message_placeholder.markdown(full_response + "▌")
-                message_placeholder.markdown(full_response)
+        try:
+            stream = provider.stream(messages_for_llm)
+            full_response = write_stream(stream, message_placeholder)
+        except Exception as e:
+            st.error(f"Error generating response: {e}", icon="❌")
     
     st.session_state.messages.append({"role": "system", "content": full_response})
+
+    # Fold the new exchange into the rolling summary off the critical path
+    if memory_type == "Conversation summary":
+        memory.update(provider, st.session_state.messages)
@@ -0,0 +1,180 @@
+"""Summarize a list of webpages without the Streamlit UI and write JSONL.
+
+Reads URLs from a text file (one per line) or from a CSV column, fetches
+and summarizes them concurrently with the same code as the Multi Webpage
+Summarizer page, and appends one JSON line per URL to the output file as
+soon as it finishes. Rerunning with the same output file skips the URLs
+already written, so an interrupted run resumes where it stopped.
+
+    python batch_summarize.py --csv HWs/Example_news_info_for_testing.csv --out summaries.jsonl
+    python batch_summarize.py --urls urls.txt --provider Cohere --concurrency 2 --out summaries.jsonl
+
+API keys come from OPENAI_API_KEY / COHERE_API_KEY / MISTRAL_API_KEY, or
+from .streamlit/secrets.toml like the pages.
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+import tomllib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from helpers.fetch import fetch_text
+from helpers.providers import get_provider
+from helpers.summarize import LANGUAGE_INSTRUCTIONS, SUMMARY_OPTIONS, summarize_document, summary_instruction_for
+from helpers.summary_cache import document_hash, get_summary_cache, summary_key
+
+# Secret name used by the pages, environment variable checked first, and
+# how many summaries each provider is asked for at once by default
+PROVIDER_SETTINGS = {
+    "OpenAI": {"secret": "key1", "env": "OPENAI_API_KEY", "concurrency": 8},
+    "Cohere": {"secret": "cohere_key", "env": "COHERE_API_KEY", "concurrency": 4},
+    "Mistral": {"secret": "mistral_key", "env": "MISTRAL_API_KEY", "concurrency": 2},
+}
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+
+def get_api_key(provider_name):
+    settings = PROVIDER_SETTINGS[provider_name]
+    if os.environ.get(settings["env"]):
+        return os.environ[settings["env"]]
+    if os.path.exists(SECRETS_PATH):
+        with open(SECRETS_PATH, "rb") as file:
+            secrets = tomllib.load(file)
+        if settings["secret"] in secrets:
+            return secrets[settings["secret"]]
+    raise SystemExit(f"No {provider_name} API key: set {settings['env']} or '{settings['secret']}' in {SECRETS_PATH}")
+
+
+def read_urls(urls_path=None, csv_path=None, column="URL"):
+    """Return the URLs to summarize, in input order and without duplicates."""
+    if csv_path:
+        with open(csv_path, encoding="utf-8", newline="") as file:
+            urls = [row.get(column) or "" for row in csv.DictReader(file)]
+    else:
+        with open(urls_path, encoding="utf-8") as file:
+            urls = [line for line in file]
+    return list(dict.fromkeys(url.strip() for url in urls if url.strip()))
+
+
+def read_checkpoint(out_path, retry_failed=False):
+    """Return the URLs already recorded in out_path (only successful ones with retry_failed)."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut off by an interruption; that URL is simply redone
+                continue
+            if record.get("status") == "ok" or not retry_failed:
+                done.add(record["url"])
+    return done
+
+
+def terminate_last_line(out_path):
+    """Close a line left half-written by an interrupted run, so new records start on their own line."""
+    if not os.path.exists(out_path) or os.path.getsize(out_path) == 0:
+        return
+    with open(out_path, "rb+") as file:
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) != b"\n":
+            file.write(b"\n")
+
+
+# Function to fetch and summarize one URL
+def summarize_url(url, provider, provider_name, summary_option, language_option, limit):
+    """Return the JSONL record for url; errors are recorded, not raised."""
+    record = {"url": url, "provider": provider_name, "model": provider.model,
+              "summary_option": summary_option, "language_option": language_option}
+    start = time.perf_counter()
+    try:
+        document = fetch_text(url)
+        record["fetch_seconds"] = round(time.perf_counter() - start, 3)
+        if not document:
+            raise ValueError("no paragraph text found")
+
+        cache = get_summary_cache()
+        cache_key = summary_key(document_hash(document), provider_name, provider.model, summary_option, language_option)
+        cached = cache.get(cache_key)
+        if cached:
+            record.update(summary=cached["summary"], cached=True, mode=cached["mode"],
+                          prompt_tokens=cached["prompt_tokens"], completion_tokens=cached["completion_tokens"])
+        else:
+            started = time.perf_counter()
+            with limit:
+                text, info = summarize_document(provider, document, summary_instruction_for(summary_option),
+                                                LANGUAGE_INSTRUCTIONS[language_option])
+            seconds = time.perf_counter() - started
+            cache.put(cache_key, text, latency=seconds, time_to_first_token=info["time_to_first_token"],
+                      usage=info, mode=info["mode"])
+            record.update(summary=text, cached=False, summarize_seconds=round(seconds, 3), **info)
+        record["status"] = "ok"
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--urls", help="text file with one URL per line")
+    source.add_argument("--csv", help="CSV file with a URL column")
+    parser.add_argument("--column", default="URL", help="URL column of --csv")
+    parser.add_argument("--out", required=True, help="JSONL file to append results to (also the checkpoint)")
+    parser.add_argument("--provider", choices=list(PROVIDER_SETTINGS), default="OpenAI")
+    parser.add_argument("--model", help="defaults to the provider's default model")
+    parser.add_argument("--summary", type=int, choices=range(len(SUMMARY_OPTIONS)), default=0,
+                        help="; ".join(f"{i}: {option}" for i, option in enumerate(SUMMARY_OPTIONS)))
+    parser.add_argument("--language", choices=list(LANGUAGE_INSTRUCTIONS), default="English")
+    parser.add_argument("--concurrency", type=int, help="summaries in flight at once (default depends on provider)")
+    parser.add_argument("--fetch-workers", type=int, default=16, help="URLs being fetched or summarized at once")
+    parser.add_argument("--retry-failed", action="store_true", help="redo URLs recorded with an error")
+    args = parser.parse_args()
+
+    urls = read_urls(args.urls, args.csv, args.column)
+    done = read_checkpoint(args.out, args.retry_failed)
+    todo = [url for url in urls if url not in done]
+    print(f"{len(urls)} URLs, {len(urls) - len(todo)} already done, {len(todo)} to summarize")
+
+    provider = get_provider(args.provider, get_api_key(args.provider), args.model)
+    limit = threading.BoundedSemaphore(args.concurrency or PROVIDER_SETTINGS[args.provider]["concurrency"])
+    summary_option = SUMMARY_OPTIONS[args.summary]
+    n_ok = n_failed = 0
+    start = time.perf_counter()
+
+    terminate_last_line(args.out)
+    with open(args.out, "a", encoding="utf-8") as out:
+        def write(futures):
+            nonlocal n_ok, n_failed
+            for future in futures:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if record["status"] == "ok":
+                    n_ok += 1
+                else:
+                    n_failed += 1
+                    print(f"failed: {record['url']}: {record['error']}")
+
+        with ThreadPoolExecutor(max_workers=args.fetch_workers) as executor:
+            pending = set()
+            for url in todo:
+                if len(pending) >= args.fetch_workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write(finished)
+                pending.add(executor.submit(summarize_url, url, provider, args.provider,
+                                            summary_option, args.language, limit))
+            write(pending)
+
+    seconds = time.perf_counter() - start
+    print(f"{n_ok} summarized, {n_failed} failed in {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
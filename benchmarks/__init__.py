@@ -0,0 +1 @@
+"""Standalone benchmarks; run from the repository root with python -m benchmarks.<name>."""
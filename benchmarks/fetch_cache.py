@@ -0,0 +1,65 @@
+"""Show what repeated chat turns cost with the webpage fetch cache.
+
+Serves a page with an ETag from a local test server, then calls fetch_text()
+once per simulated turn with the TTL disabled, so every turn after the first
+revalidates and should be answered by a 304 without any parse work.
+
+    python -m benchmarks.fetch_cache --turns 20
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = ("<html><body>" + "".join(f"<p>Paragraph {i} of the test page.</p>" for i in range(2000))
+        + "</body></html>").encode("utf-8")
+ETAG = '"%s"' % hashlib.sha256(PAGE).hexdigest()[:16]
+server_counts = {"200": 0, "304": 0}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG:
+            server_counts["304"] += 1
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        server_counts["200"] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    # Use a throwaway cache so the first turn is always cold
+    os.environ["FETCH_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "http.sqlite")
+    from helpers.fetch import fetch_stats, fetch_text
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        fetch_text(url, ttl=0)
+        print(f"turn {turn + 1:3d}: {1000 * (time.perf_counter() - start):7.2f} ms  {dict(fetch_stats)}")
+    server.shutdown()
+    print(f"server responses: {server_counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare sequential and concurrent fetching of several slow pages.
+
+Starts a local server where every page answers after --delay seconds (one
+page never answers, to exercise the read timeout), then fetches the same
+URLs one after another and with fetch_all().
+
+    python -m benchmarks.fetch_many --pages 8 --delay 0.5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = b"<html><body><p>Slow page.</p></body></html>"
+
+
+def make_handler(delay, hang):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(hang if self.path == "/hang" else delay)
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(PAGE)))
+                self.end_headers()
+                self.wfile.write(PAGE)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up on the hanging page
+                pass
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--read-timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # Fresh cache, no TTL reuse, and a short read timeout for the hanging page
+    os.environ["FETCH_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "http.sqlite")
+    os.environ["FETCH_READ_TIMEOUT"] = str(args.read_timeout)
+    from helpers.fetch import FETCH_PER_HOST, fetch_all, fetch_text
+
+    servers = []
+    # Spread pages over several hosts (ports) so the per-host limit doesn't serialize them
+    for _ in range(max(1, args.pages // FETCH_PER_HOST)):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.delay, args.read_timeout * 3))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    urls = [f"http://127.0.0.1:{servers[i % len(servers)].server_address[1]}/page{i}" for i in range(args.pages)]
+    urls.append(f"http://127.0.0.1:{servers[0].server_address[1]}/hang")
+
+    start = time.perf_counter()
+    failed = 0
+    for url in urls:
+        try:
+            fetch_text(url, ttl=0)
+        except Exception:
+            failed += 1
+    print(f"sequential: {time.perf_counter() - start:6.2f} s  ({failed} failed)")
+
+    start = time.perf_counter()
+    results = fetch_all(urls, ttl=0)
+    failed = sum(1 for result in results if result.error)
+    in_order = [result.url for result in results] == urls
+    print(f"concurrent: {time.perf_counter() - start:6.2f} s  ({failed} failed, input order kept: {in_order})")
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
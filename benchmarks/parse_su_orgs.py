@@ -0,0 +1,39 @@
+"""Measure su_orgs parse throughput (files/sec).
+
+The embedded-JSON path runs inline without a process pool, so it is timed
+once. The BeautifulSoup fallback is fanned out over worker processes and is
+timed for 1..N workers.
+
+    python -m benchmarks.parse_su_orgs --max-workers 8
+"""
+import argparse
+import os
+import time
+
+from helpers.su_orgs import HTML_PARSER, SU_ORGS_PATH, iter_su_orgs_documents
+
+
+def measure(path, workers, structured):
+    start = time.perf_counter()
+    n_files = sum(1 for _ in iter_su_orgs_documents(path, workers=workers, structured=structured))
+    return n_files, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=SU_ORGS_PATH)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # The JSON path never uses the pool, so it is timed once
+    n_files, seconds = measure(args.path, 1, structured=True)
+    print(f"initialAppState (inline)  files={n_files}  {seconds:6.2f}s  {n_files / seconds:8.1f} files/sec")
+
+    print(f"html ({HTML_PARSER}):")
+    for workers in range(1, args.max_workers + 1):
+        n_files, seconds = measure(args.path, workers, structured=False)
+        print(f"workers={workers:2d}  files={n_files}  {seconds:6.2f}s  {n_files / seconds:8.1f} files/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare PDF text extraction as Document Q&A used to do it with helpers.pdf.
+
+Generates a PDF with --pages pages of text, then times:
+  concat      the old read_pdf(): document += page.get_text(), on every rerun
+  cold        open_pdf().text on a new file, with 1 and with --workers processes
+  rerun       open_pdf().text again for the same upload (in-memory hit)
+  restart     the same file after a process restart (pages read from disk)
+
+    python -m benchmarks.pdf_extract --pages 500 --reruns 5
+"""
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import fitz
+
+LINE = "The quick brown fox jumps over the lazy dog while the benchmark measures text extraction. "
+
+
+def generate_pdf(n_pages, lines_per_page=45):
+    doc = fitz.open()
+    for i in range(n_pages):
+        page = doc.new_page()
+        text = "\n".join(f"{i}.{j} {LINE}" for j in range(lines_per_page))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def old_read_pdf(file):
+    document = ""
+    with fitz.open(stream=file.read(), filetype="pdf") as doc:
+        for page in doc:
+            document += page.get_text()
+    return document
+
+
+def timed(label, fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    seconds = (time.perf_counter() - start) / repeat
+    print(f"{label:28s} {1000 * seconds:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    os.environ["PDF_CACHE_DIR"] = cache_dir
+    import helpers.pdf as pdf
+
+    data = generate_pdf(args.pages)
+    print(f"{args.pages} pages, {len(data) / 1e6:.1f} MB")
+
+    reference = timed("concat (per rerun)", lambda: old_read_pdf(io.BytesIO(data)), args.reruns)
+
+    def cold(workers):
+        pdf._open_pdfs.clear()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        doc = pdf.open_pdf(io.BytesIO(data))
+        return "".join(doc.extract_all(workers=workers).pages())
+
+    assert timed("cold, workers=1", lambda: cold(1)) == reference
+    assert timed(f"cold, workers={args.workers}", lambda: cold(args.workers)) == reference
+    timed("rerun (same upload)", lambda: pdf.open_pdf(io.BytesIO(data)).text, args.reruns)
+
+    def restart():
+        pdf._open_pdfs.clear()
+        return pdf.open_pdf(io.BytesIO(data)).text
+
+    assert timed("restart (pages on disk)", restart) == reference
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
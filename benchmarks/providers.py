@@ -0,0 +1,138 @@
+"""Measure each provider's streaming code path offline.
+
+Every provider adapter is run with its _events() replaced by a replay of a
+stream fixture, so the real _parse() and ProviderStream bookkeeping run on
+the provider loop exactly as in the pages, without any network. Fixtures
+are synthetic streams shaped like each SDK's events, or recordings loaded
+with --fixture NAME=path.json in the same format:
+
+    {"events": [{"delay": 0.05, "event": {...SDK event as nested dicts...}}, ...]}
+
+For every provider this prints one JSON line with time to first token,
+total latency, tokens/sec, and the client-side overhead (total latency
+minus the delays scheduled by the fixture), averaged over --repeat runs.
+
+    python -m benchmarks.providers
+    python -m benchmarks.providers --chunks 2000 --delay 0 --repeat 20 --out results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from types import SimpleNamespace
+
+from helpers.providers import PROVIDERS, Provider
+
+
+def _namespace(value):
+    """Turn nested dicts into attribute objects like the SDKs return."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+def synthetic_events(name, pieces, prompt_tokens):
+    """Return the raw events a provider's SDK would stream for pieces of text."""
+    completion_tokens = len(pieces)
+    if name == "OpenAI":
+        events = [{"choices": [{"delta": {"content": piece}}], "usage": None} for piece in pieces]
+        events.append({"choices": [], "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}})
+    elif name == "Cohere":
+        events = [{"event_type": "stream-start"}]
+        events += [{"event_type": "text-generation", "text": piece} for piece in pieces]
+        events.append({"event_type": "stream-end", "response": {"meta": {"billed_units": {
+            "input_tokens": prompt_tokens, "output_tokens": completion_tokens}}}})
+    elif name == "Gemini":
+        events = [{"text": piece, "usage_metadata": None} for piece in pieces]
+        events[-1]["usage_metadata"] = {"prompt_token_count": prompt_tokens, "candidates_token_count": completion_tokens}
+    elif name == "Mistral":
+        events = [{"data": {"choices": [{"delta": {"content": piece}}], "usage": None}} for piece in pieces]
+        events.append({"data": {"choices": [], "usage": {"prompt_tokens": prompt_tokens,
+                                                          "completion_tokens": completion_tokens}}})
+    else:
+        raise ValueError(f"no synthetic fixture for {name}")
+    return events
+
+
+def synthetic_fixture(name, chunks, first_token_delay, delay, prompt_tokens=500):
+    events = synthetic_events(name, [f" token{i}" for i in range(chunks)], prompt_tokens)
+    return {"events": [{"delay": first_token_delay if i == 0 else delay, "event": event}
+                       for i, event in enumerate(events)]}
+
+
+def replay_provider(name, fixture):
+    """Return an instance of the named provider that streams fixture instead of calling its SDK."""
+    provider_class = PROVIDERS[name]
+    events = [(step["delay"], _namespace(step["event"])) for step in fixture["events"]]
+
+    async def replay(self, messages, **options):
+        for delay, event in events:
+            if delay:
+                await asyncio.sleep(delay)
+            yield event
+
+    def init(self):
+        Provider.__init__(self, "replay")
+
+    replay_class = type(f"Replay{provider_class.__name__}", (provider_class,), {"__init__": init, "_events": replay})
+    return replay_class()
+
+
+def measure(provider, fixture):
+    """Stream the fixture once and return its timings."""
+    stream = provider.stream([{"role": "user", "content": "benchmark"}])
+    n_chunks = sum(1 for _ in stream)
+    scheduled = sum(step["delay"] for step in fixture["events"])
+    generation = stream.total_latency - (stream.time_to_first_token or 0)
+    completion_tokens = stream.usage.get("completion_tokens") or n_chunks
+    return {
+        "chunks": n_chunks,
+        "time_to_first_token": stream.time_to_first_token,
+        "total_latency": stream.total_latency,
+        "tokens_per_sec": completion_tokens / generation if generation > 0 else None,
+        "overhead": stream.total_latency - scheduled,
+        "overhead_per_chunk_us": 1e6 * (stream.total_latency - scheduled) / max(n_chunks, 1),
+        "usage_ok": bool(stream.usage),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", nargs="+", default=list(PROVIDERS), choices=list(PROVIDERS))
+    parser.add_argument("--chunks", type=int, default=300, help="text chunks per synthetic stream")
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--delay", type=float, default=0.002, help="seconds between synthetic chunks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fixture", action="append", default=[], metavar="NAME=PATH",
+                        help="replay a recorded fixture for a provider instead of the synthetic one")
+    parser.add_argument("--out", help="also append the JSON lines to this file")
+    args = parser.parse_args()
+
+    recorded = {}
+    for item in args.fixture:
+        name, path = item.split("=", 1)
+        with open(path, encoding="utf-8") as file:
+            recorded[name] = json.load(file)
+
+    lines = []
+    for name in args.providers:
+        fixture = recorded.get(name) or synthetic_fixture(name, args.chunks, args.first_token_delay, args.delay)
+        provider = replay_provider(name, fixture)
+        runs = [measure(provider, fixture) for _ in range(args.repeat)]
+        result = {"provider": name, "fixture": "recorded" if name in recorded else "synthetic", "runs": args.repeat,
+                  "chunks": runs[0]["chunks"], "usage_ok": all(run["usage_ok"] for run in runs)}
+        for metric in ("time_to_first_token", "total_latency", "tokens_per_sec", "overhead", "overhead_per_chunk_us"):
+            values = [run[metric] for run in runs if run[metric] is not None]
+            result[metric] = round(statistics.median(values), 6) if values else None
+        lines.append(json.dumps(result))
+        print(lines[-1])
+
+    if args.out:
+        with open(args.out, "a", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Report the tokens saved per su_orgs page by stripping the learned template.
+
+    python -m benchmarks.su_orgs_boilerplate --html --min-fraction 0.5
+"""
+import argparse
+
+from helpers.boilerplate import learn_boilerplate, strip_boilerplate
+from helpers.su_orgs import SU_ORGS_PATH, iter_su_orgs_documents
+from helpers.tokens import count_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=SU_ORGS_PATH)
+    parser.add_argument("--min-fraction", type=float, default=0.5)
+    parser.add_argument("--html", action="store_true", help="measure the full-DOM text instead of the embedded JSON")
+    args = parser.parse_args()
+
+    docs = list(iter_su_orgs_documents(args.path, structured=not args.html))
+    boilerplate = learn_boilerplate((doc["text"] for doc in docs), args.min_fraction)
+    print(f"template lines: {len(boilerplate)}")
+
+    total_before = total_after = 0
+    for doc in sorted(docs, key=lambda d: d["id"]):
+        before = count_tokens(doc["text"])
+        after = count_tokens(strip_boilerplate(doc["text"], boilerplate))
+        total_before += before
+        total_after += after
+        print(f"{before:7d} -> {after:6d} tokens  ({before - after:6d} saved)  {doc['id']}")
+    saved = total_before - total_after
+    print(f"overall: {total_before} -> {total_after} tokens, {saved} saved "
+          f"({100 * saved / max(total_before, 1):.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compare the old pop-and-recount history trimming with helpers.tokens.
+
+    python -m benchmarks.token_budget --turns 200 --budget 5000
+"""
+import argparse
+import random
+import time
+
+import tiktoken
+
+from helpers.tokens import truncate_messages_by_tokens
+
+
+# The implementation the Chatbot and RAG pages used before helpers.tokens
+def _old_calculate_tokens(messages):
+    total_tokens = 0
+    encoding = tiktoken.encoding_for_model('gpt-4o-mini')
+    for msg in messages:
+        total_tokens += len(encoding.encode(msg['content']))
+    return total_tokens
+
+
+def _old_truncate_messages_by_tokens(messages, max_tokens):
+    total_tokens = _old_calculate_tokens(messages)
+    while total_tokens > max_tokens and len(messages) > 1:
+        messages.pop(0)
+        total_tokens = _old_calculate_tokens(messages)
+    return messages
+
+
+def synthetic_history(turns, context_words, seed=0):
+    rng = random.Random(seed)
+    words = ["student", "organization", "event", "syracuse", "club", "meeting", "budget", "the", "a", "of"]
+    sentence = lambda n: " ".join(rng.choice(words) for _ in range(n))
+    messages = [{"role": "system", "content": f"Here are the documents to reference: {sentence(context_words)}"}]
+    for _ in range(turns):
+        messages.append({"role": "user", "content": sentence(rng.randint(5, 40))})
+        messages.append({"role": "system", "content": sentence(rng.randint(50, 300))})
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=5000)
+    parser.add_argument("--context-words", type=int, default=3000)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.turns, args.context_words)
+    print(f"{len(history)} messages, budget {args.budget} tokens")
+
+    start = time.perf_counter()
+    _old_truncate_messages_by_tokens(list(history), args.budget)
+    print(f"old (pop + recount):   {1000 * (time.perf_counter() - start):9.1f} ms")
+
+    cache = {}
+    for label in ("new (cold cache):", "new (warm cache):"):
+        start = time.perf_counter()
+        truncate_messages_by_tokens(history, args.budget, cache=cache)
+        print(f"{label:22s} {1000 * (time.perf_counter() - start):9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
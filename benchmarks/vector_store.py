@@ -0,0 +1,82 @@
+"""Compare the numpy and Chroma vector store backends.
+
+Builds the same collection of random unit vectors with both backends, then
+reports the time to open it again (as a fresh process would), the query
+latency for single and batched queries, and the recall of each backend
+against exact search.
+
+    python -m benchmarks.vector_store --rows 5000 --dim 1536 --queries 200
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from helpers.vector_store import NumpyCollection, open_collection
+
+METADATA = {"hnsw:space": "cosine", "hnsw:M": 32}
+
+
+def build(backend, path, ids, vectors, batch=1000):
+    collection = open_collection(path, "Bench", metadata=METADATA, backend=backend)
+    for start in range(0, len(ids), batch):
+        collection.upsert(
+            ids=ids[start:start + batch],
+            embeddings=vectors[start:start + batch].tolist(),
+            documents=[f"document {i}" for i in range(start, min(start + batch, len(ids)))],
+            metadatas=[{"n": i} for i in range(start, min(start + batch, len(ids)))],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.rows, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    ids = [f"id{i}" for i in range(args.rows)]
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+    expected = [{ids[i] for i in row} for row in exact]
+
+    for backend in ("numpy", "chroma"):
+        path = tempfile.mkdtemp()
+        try:
+            start = time.perf_counter()
+            build(backend, path, ids, vectors)
+            build_seconds = time.perf_counter() - start
+        except ImportError as e:
+            print(f"{backend:6s}  skipped ({e})")
+            continue
+
+        start = time.perf_counter()
+        if backend == "numpy":
+            collection = NumpyCollection(f"{path}/Bench")
+        else:
+            collection = open_collection(path, "Bench", metadata=METADATA, backend=backend)
+            collection.query(query_embeddings=[queries[0].tolist()], n_results=args.k)
+        open_ms = 1000 * (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        found = [collection.query(query_embeddings=[q.tolist()], n_results=args.k)["ids"][0] for q in queries]
+        single_ms = 1000 * (time.perf_counter() - start) / args.queries
+
+        start = time.perf_counter()
+        collection.query(query_embeddings=queries.tolist(), n_results=args.k)
+        batch_ms = 1000 * (time.perf_counter() - start) / args.queries
+
+        recall = np.mean([len(expected[i] & set(found[i])) / args.k for i in range(args.queries)])
+        print(f"{backend:6s}  build {build_seconds:6.2f}s  open {open_ms:8.1f} ms  "
+              f"query {single_ms:7.2f} ms  batched {batch_ms:7.2f} ms/query  recall@{args.k} {recall:.3f}")
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
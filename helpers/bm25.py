@@ -0,0 +1,102 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the to was were will with".split()
+)
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords."""
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS]
+
+
+def normalize_query(text):
+    """Canonical form of a short query, for exact matches against tags."""
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents, stored as an inverted index.
+
+    postings maps each term to [[document number, term frequency], ...];
+    tags maps exact-match keys (e.g. company names, as normalized by
+    normalize_query) to the ids they label. The index is plain JSON so it
+    can be saved once and loaded on startup.
+    """
+
+    def __init__(self, ids, postings, lengths, tags=None, fingerprint=None, k1=BM25_K1, b=BM25_B):
+        self.ids = ids
+        self.postings = postings
+        self.lengths = lengths
+        self.tags = tags or {}
+        self.fingerprint = fingerprint
+        self.k1 = k1
+        self.b = b
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+
+    @classmethod
+    def build(cls, documents, fingerprint=None):
+        """Index an iterable of (id, text, tag) triples; tag may be None."""
+        ids, lengths, postings, tags = [], [], {}, {}
+        for number, (doc_id, text, tag) in enumerate(documents):
+            tokens = tokenize(text)
+            ids.append(doc_id)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append([number, tf])
+            if tag:
+                tags.setdefault(normalize_query(tag), []).append(doc_id)
+        return cls(ids, postings, lengths, tags, fingerprint)
+
+    def __contains__(self, term):
+        return term in self.postings
+
+    def search(self, query, k=10, allowed=None):
+        """Return the k best [(id, score)] for query, best first.
+
+        allowed, if given, is a set of ids; other documents are not scored.
+        """
+        scores = Counter()
+        n_docs = len(self.ids)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for number, tf in postings:
+                if allowed is not None and self.ids[number] not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[number] / self.avg_length)
+                scores[number] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return [(self.ids[number], score) for number, score in scores.most_common(k)]
+
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"fingerprint": self.fingerprint, "k1": self.k1, "b": self.b, "ids": self.ids,
+                       "lengths": self.lengths, "tags": self.tags, "postings": self.postings}, file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data["ids"], data["postings"], data["lengths"], data["tags"], data["fingerprint"],
+                   data["k1"], data["b"])
+
+
+# Function to merge several rankings into one
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse ranked lists of ids; each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores = Counter()
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1 / (k + rank)
+    return [doc_id for doc_id, _ in scores.most_common()]
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+from collections import Counter
+
+BOILERPLATE_MIN_DOC_FRACTION = 0.5
+BOILERPLATE_MIN_DOCS = 5
+
+
+# Function to learn the text blocks shared by a templated corpus
+def learn_boilerplate(texts, min_doc_fraction=BOILERPLATE_MIN_DOC_FRACTION, min_docs=BOILERPLATE_MIN_DOCS):
+    """Return the set of lines that occur in more than min_doc_fraction of the texts.
+
+    Lines are compared after stripping whitespace and each line is counted
+    at most once per text. Corpora smaller than min_docs have no template.
+    """
+    counts = Counter()
+    n_texts = 0
+    for text in texts:
+        n_texts += 1
+        counts.update({line.strip() for line in text.splitlines() if line.strip()})
+    if n_texts < min_docs:
+        return frozenset()
+    return frozenset(line for line, n in counts.items() if n / n_texts > min_doc_fraction)
+
+
+# Function to drop template lines from a document
+def strip_boilerplate(text, boilerplate):
+    """Remove every line of text that belongs to the learned template."""
+    if not boilerplate:
+        return text
+    return "\n".join(line for line in text.splitlines() if line.strip() and line.strip() not in boilerplate)
+
+
+def boilerplate_digest(boilerplate):
+    """Short, order-independent digest of a template, for use in fingerprints."""
+    return hashlib.sha256("\n".join(sorted(boilerplate)).encode("utf-8")).hexdigest()[:12]
+
+
+# Function to load a learned template from disk, learning it on first use
+def load_or_learn_boilerplate(path, texts, min_doc_fraction=BOILERPLATE_MIN_DOC_FRACTION):
+    """Return the template stored at path, or learn it from texts() and store it.
+
+    texts is a callable so the corpus is only read when no template exists
+    yet. Delete the file to relearn the template.
+    """
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            return frozenset(json.load(file)["lines"])
+    boilerplate = learn_boilerplate(texts(), min_doc_fraction)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"min_doc_fraction": min_doc_fraction, "lines": sorted(boilerplate)}, file, indent=1)
+    return boilerplate
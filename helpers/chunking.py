@@ -0,0 +1,128 @@
+import re
+from collections import deque
+
+from helpers.embeddings import EMBEDDING_MODEL
+from helpers.tokens import get_encoding
+
+CHUNK_TOKENS = 400
+CHUNK_OVERLAP_TOKENS = 50
+
+
+def _units(text, max_tokens, encoding):
+    """Yield (start, end, n_tokens) for each line of text, splitting lines longer than max_tokens."""
+    for match in re.finditer(r"[^\n]+", text):
+        line = match.group()
+        if not line.strip():
+            continue
+        tokens = encoding.encode(line)
+        if len(tokens) <= max_tokens:
+            yield match.start(), match.end(), len(tokens)
+            continue
+        _, offsets = encoding.decode_with_offsets(tokens)
+        for i in range(0, len(tokens), max_tokens):
+            start = match.start() + offsets[i]
+            end = match.start() + offsets[i + max_tokens] if i + max_tokens < len(tokens) else match.end()
+            yield start, end, len(tokens[i:i + max_tokens])
+
+
+# Function to split a text into token-bounded chunks
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS, model=EMBEDDING_MODEL):
+    """Yield chunks of at most max_tokens tokens, breaking only at line boundaries.
+
+    Lines are packed together until the next one would overflow the chunk;
+    a line that is too long on its own is cut at token boundaries. Each new
+    chunk starts with the trailing lines of the previous one, up to
+    overlap_tokens. Chunks are dicts with "text", "index", "tokens" and the
+    "char_start"/"char_end" offsets of the chunk in the original text.
+    """
+    encoding = get_encoding(model)
+    window = deque()
+    window_tokens = 0
+    index = 0
+
+    def emit():
+        start, end = window[0][0], window[-1][1]
+        return {"text": text[start:end], "index": index, "tokens": window_tokens,
+                "char_start": start, "char_end": end}
+
+    for unit in _units(text, max_tokens, encoding):
+        if window and window_tokens + unit[2] > max_tokens:
+            yield emit()
+            index += 1
+            while window and (window_tokens > overlap_tokens or window_tokens + unit[2] > max_tokens):
+                window_tokens -= window.popleft()[2]
+        window.append(unit)
+        window_tokens += unit[2]
+    if window:
+        yield emit()
+
+
+# Function to expand documents into chunk documents
+def chunk_documents(documents, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Turn {"id", "text", "metadata"} documents into one document per chunk.
+
+    Chunk ids are "<parent id>#<chunk index>" and each chunk's metadata
+    extends the parent's with "parent", "chunk_index", "n_chunks",
+    "char_start" and "char_end". n_chunks lets a later sync notice a parent
+    whose chunks were only partly written.
+    """
+    for doc in documents:
+        chunks = list(chunk_text(doc["text"], max_tokens, overlap_tokens))
+        for chunk in chunks:
+            yield {
+                "id": f"{doc['id']}#{chunk['index']}",
+                "text": chunk["text"],
+                "metadata": {
+                    **doc.get("metadata", {}),
+                    "parent": doc["id"],
+                    "chunk_index": chunk["index"],
+                    "n_chunks": len(chunks),
+                    "char_start": chunk["char_start"],
+                    "char_end": chunk["char_end"],
+                },
+            }
+
+
+# Function to merge retrieved chunks that belong to the same document
+def collapse_by_parent(results, k, max_chunks_per_parent=2):
+    """Group the chunks of a Chroma query result by parent document.
+
+    The best k parents (by their closest chunk) are kept, and each parent's
+    best max_chunks_per_parent chunks are joined in document order. The
+    result keeps the Chroma layout, with one entry per parent.
+    """
+    groups = {}
+    for doc_id, document, metadata, distance in zip(
+        results["ids"][0], results["documents"][0], results["metadatas"][0], results["distances"][0]
+    ):
+        parent = (metadata or {}).get("parent", doc_id)
+        group = groups.setdefault(parent, {"distance": distance, "chunks": []})
+        group["distance"] = min(group["distance"], distance)
+        if len(group["chunks"]) < max_chunks_per_parent:
+            group["chunks"].append(((metadata or {}).get("chunk_index", 0), document))
+
+    best = sorted(groups.items(), key=lambda item: item[1]["distance"])[:k]
+    return {
+        "ids": [[parent for parent, _ in best]],
+        "documents": [[" ... ".join(text for _, text in sorted(group["chunks"])) for _, group in best]],
+        "metadatas": [[{"parent": parent, "n_chunks": len(group["chunks"])} for parent, group in best]],
+        "distances": [[group["distance"] for _, group in best]],
+    }
+
+
+# Function to retrieve the best chunks for a query embedding
+def query_chunks(collection, query_embedding, k=3, collapse=True, candidates_per_result=4, where=None):
+    """Query a chunked collection and return the k best chunks or parents.
+
+    With collapse, k * candidates_per_result chunks are retrieved and folded
+    into the k best parent documents (see collapse_by_parent); otherwise the
+    k closest chunks are returned as they are. where is passed on to
+    collection.query as a metadata filter.
+    """
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        include=['documents', 'distances', 'metadatas'],
+        n_results=k * candidates_per_result if collapse else k,
+        **({"where": where} if where else {})
+    )
+    return collapse_by_parent(results, k) if collapse else results
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+import time
+
+from openai import AsyncOpenAI, OpenAI
+
+# How long a key verification result is trusted before the provider is asked again.
+# Failures are kept for a shorter time so a fixed key is picked up quickly.
+VERIFY_TTL = 3600
+VERIFY_FAILURE_TTL = 60
+
+_clients = {}
+_verified = {}
+_lock = threading.Lock()
+
+
+def _registry_key(provider, api_key, *extra):
+    return (provider, hashlib.sha256(api_key.encode("utf-8")).hexdigest(), *extra)
+
+
+def _get_or_create(key, factory):
+    with _lock:
+        if key not in _clients:
+            _clients[key] = factory()
+        return _clients[key]
+
+
+# Functions to get the process-wide client for a provider and key. Each SDK
+# client owns a pooled HTTP connection, so sharing one instance across
+# reruns and sessions keeps connections warm. The non-OpenAI SDKs are
+# imported on first use so pages that only talk to OpenAI don't load them.
+def get_openai_client(api_key):
+    return _get_or_create(_registry_key("openai", api_key), lambda: OpenAI(api_key=api_key))
+
+
+def get_async_openai_client(api_key):
+    return _get_or_create(_registry_key("openai-async", api_key), lambda: AsyncOpenAI(api_key=api_key))
+
+
+def get_cohere_client(api_key):
+    import cohere
+    return _get_or_create(_registry_key("cohere", api_key), lambda: cohere.Client(api_key))
+
+
+def get_async_cohere_client(api_key):
+    import cohere
+    return _get_or_create(_registry_key("cohere-async", api_key), lambda: cohere.AsyncClient(api_key))
+
+
+def get_mistral_client(api_key):
+    from mistralai import Mistral
+    return _get_or_create(_registry_key("mistral", api_key), lambda: Mistral(api_key=api_key))
+
+
+def get_gemini_client(api_key, model='gemini-pro'):
+    def create():
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(model)
+    return _get_or_create(_registry_key("gemini", api_key, model), create)
+
+
+def _verify(provider, api_key, get_client, check):
+    """Return (client, is_valid, message), reusing a recent result for the same key."""
+    key = _registry_key(provider, api_key)
+    with _lock:
+        cached = _verified.get(key)
+    if cached and cached["expires"] > time.monotonic():
+        return cached["result"]
+    try:
+        client = get_client(api_key)
+        check(client)
+        result, ttl = (client, True, "API key is valid"), VERIFY_TTL
+    except Exception as e:
+        result, ttl = (None, False, str(e)), VERIFY_FAILURE_TTL
+    with _lock:
+        _verified[key] = {"result": result, "expires": time.monotonic() + ttl}
+    return result
+
+
+# Function to verify OpenAI API key
+def verify_openai_key(api_key):
+    return _verify("openai", api_key, get_openai_client, lambda client: client.models.list())
+
+
+# Function to verify Cohere API key
+def verify_cohere_key(api_key):
+    return _verify("cohere", api_key, get_cohere_client, lambda client: client.models.list())
+
+
+# Function to verify Mistral API key
+def verify_mistral_key(api_key):
+    return _verify("mistral", api_key, get_mistral_client, lambda client: client.models.list())
+
+
+# Function to verify Gemini API key
+def verify_gemini_key(api_key):
+    # Creating the model makes no request; the key is checked on first use
+    return _verify("gemini", api_key, get_gemini_client, lambda client: None)
@@ -0,0 +1,48 @@
+from helpers.chunking import chunk_documents, query_chunks
+from helpers.embeddings import embed_text
+from helpers.ingest import ingest_documents
+from helpers.tokens import message_tokens
+
+DOC_QA_DB_PATH = "DocQA_VectorDB"
+DOC_QA_COLLECTION = "DocQACollection"
+# Uploads up to FULL_DOCUMENT_MAX_TOKENS (all files together) are sent in
+# full; larger ones are answered from the DOC_QA_TOP_K closest chunks.
+FULL_DOCUMENT_MAX_TOKENS = 6000
+DOC_QA_TOP_K = 6
+
+
+def use_full_documents(texts, max_tokens=FULL_DOCUMENT_MAX_TOKENS, cache=None):
+    """Whether the uploaded texts are small enough to send as they are.
+
+    cache is a token count cache as for helpers.tokens.message_tokens.
+    """
+    return sum(message_tokens({"content": text}, cache) for text in texts) <= max_tokens
+
+
+# Function to chunk and embed an uploaded document unless it is already stored
+def ensure_indexed(collection, client, digest, name, text):
+    """Index text under its file hash; return True if it had to be embedded.
+
+    Chunks are stored with "parent" set to the file hash, so a file that
+    was uploaded before (in any session) is found and reused as is. A file
+    with fewer stored chunks than their "n_chunks" (e.g. an embedding
+    request failed partway) is indexed again.
+    """
+    stored = collection.get(where={"parent": digest}, include=["metadatas"])
+    if stored["ids"] and all((meta or {}).get("n_chunks") == len(stored["ids"]) for meta in stored["metadatas"]):
+        return False
+    if stored["ids"]:
+        collection.delete(ids=stored["ids"])
+    ingest_documents(collection, chunk_documents([{"id": digest, "text": text, "metadata": {"name": name}}]), client)
+    return True
+
+
+# Function to find the chunks of the given files closest to a question
+def retrieve_chunks(collection, client, question, digests, k=DOC_QA_TOP_K):
+    """Return [(file name, chunk text)] for the k chunks of the digests' files closest to question."""
+    where = {"parent": digests[0]} if len(digests) == 1 else {"parent": {"$in": list(digests)}}
+    results = query_chunks(collection, embed_text(client, question), k=k, collapse=False, where=where)
+    # Present the chunks file by file, in upload and reading order
+    chunks = sorted(zip(results["metadatas"][0], results["documents"][0]),
+                    key=lambda item: (digests.index(item[0]["parent"]), item[0]["chunk_index"]))
+    return [(metadata["name"], text) for metadata, text in chunks]
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import time
+import unicodedata
+from array import array
+
+from helpers.sqlite_cache import SQLiteCache
+
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", 200_000))
+
+
+def normalize_text(text):
+    """Normalize text before hashing so trivially different inputs share a vector."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_key(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(SQLiteCache):
+    """On-disk embedding cache keyed by (model, dimensions, sha256 of normalized text).
+
+    Vectors are stored as float32 blobs in SQLite. Every hit refreshes the
+    entry's last-used time, and once the cache grows past max_entries the
+    least recently used tenth of the entries is evicted.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        " model TEXT NOT NULL, dimensions INTEGER NOT NULL, text_hash TEXT NOT NULL,"
+        " vector BLOB NOT NULL, last_used REAL NOT NULL,"
+        " PRIMARY KEY (model, dimensions, text_hash))",
+        "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)",
+    )
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys, model, dimensions=None):
+        """Return {key: vector} for the keys that are cached."""
+        dims = dimensions or 0
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT text_hash, vector FROM embeddings WHERE model = ? AND dimensions = ?"
+                    f" AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model, dims, *chunk],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                    [(now, model, dims, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items, model, dimensions=None):
+        """Store an iterable of (key, vector) pairs."""
+        dims = dimensions or 0
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dimensions, text_hash, vector, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(model, dims, key, array("f", vector).tobytes(), now) for key, vector in items],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return
+        n_evict = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN"
+            " (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (n_evict,),
+        )
+
+    def stats(self):
+        """Return hit/miss counters for this process plus the number of stored vectors."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+# Function to get the process-wide embedding cache
+def get_embedding_cache():
+    return EmbeddingCache.shared()
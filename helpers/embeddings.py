@@ -0,0 +1,74 @@
+from helpers.embedding_cache import get_embedding_cache, normalize_text, text_key
+from helpers.tokens import get_encoding
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Limits of the OpenAI embeddings endpoint. A single input may not exceed
+# MAX_INPUT_TOKENS; a request may carry at most MAX_BATCH_SIZE inputs. The
+# per-request token budget is kept well below the API ceiling so a batch
+# stays a reasonably sized HTTP payload.
+MAX_INPUT_TOKENS = 8191
+MAX_BATCH_SIZE = 2048
+MAX_BATCH_TOKENS = 100_000
+
+
+# Function to clip a text to the embedding model's input limit
+def truncate_for_embedding(text, max_tokens=MAX_INPUT_TOKENS, model=EMBEDDING_MODEL):
+    """Return (text, token_count), cutting the text down to max_tokens if needed."""
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text, len(tokens)
+    return encoding.decode(tokens[:max_tokens]), max_tokens
+
+
+# Function to group items into token-bounded embedding batches
+def batch_by_tokens(pairs, max_tokens=MAX_BATCH_TOKENS, max_items=MAX_BATCH_SIZE):
+    """Yield lists of items whose summed token counts stay within max_tokens.
+
+    pairs is an iterable of (item, token_count). An item larger than
+    max_tokens on its own is emitted as a single-item batch.
+    """
+    batch, batch_tokens = [], 0
+    for item, n_tokens in pairs:
+        if batch and (batch_tokens + n_tokens > max_tokens or len(batch) >= max_items):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += n_tokens
+    if batch:
+        yield batch
+
+
+# Function to embed a list of texts in one request
+def embed_texts(client, texts, model=EMBEDDING_MODEL, dimensions=None, use_cache=True):
+    """Embed texts, preserving input order.
+
+    Vectors already in the on-disk embedding cache are served from it; the
+    remaining (deduplicated) texts are embedded with a single
+    embeddings.create call and written back to the cache.
+    """
+    texts = [normalize_text(text) for text in texts]
+    if not texts:
+        return []
+    cache = get_embedding_cache() if use_cache else None
+    keys = [text_key(text) for text in texts]
+    vectors = cache.get_many(keys, model, dimensions) if cache else {}
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+    if missing:
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        response = client.embeddings.create(input=list(missing.values()), model=model, **kwargs)
+        fresh = dict(zip(missing, (d.embedding for d in sorted(response.data, key=lambda d: d.index))))
+        if cache:
+            cache.put_many(fresh.items(), model, dimensions)
+        vectors.update(fresh)
+    return [vectors[key] for key in keys]
+
+
+def embed_text(client, text, model=EMBEDDING_MODEL, dimensions=None):
+    """Embed a single text, e.g. a search query."""
+    return embed_texts(client, [text], model=model, dimensions=dimensions)[0]
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from helpers.sqlite_cache import SQLiteCache
+
+FETCH_CACHE_PATH = os.environ.get("FETCH_CACHE_PATH", os.path.join(".cache", "http.sqlite"))
+# Responses younger than FETCH_CACHE_TTL seconds are used without contacting the
+# server; older ones are revalidated with a conditional GET.
+FETCH_CACHE_TTL = int(os.environ.get("FETCH_CACHE_TTL", 300))
+# Upper bound on the extracted text kept on disk, in bytes.
+FETCH_CACHE_MAX_BYTES = int(os.environ.get("FETCH_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+# (connect, read) timeouts in seconds, and the largest body accepted per page
+FETCH_TIMEOUT = (float(os.environ.get("FETCH_CONNECT_TIMEOUT", 5)), float(os.environ.get("FETCH_READ_TIMEOUT", 15)))
+FETCH_MAX_RESPONSE_BYTES = int(os.environ.get("FETCH_MAX_RESPONSE_BYTES", 10 * 1024 * 1024))
+# Concurrency for fetch_many(): overall worker threads and requests in flight per host
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", 8))
+FETCH_PER_HOST = int(os.environ.get("FETCH_PER_HOST", 2))
+
+# Process-wide counters, handy for checking that reruns hit the cache
+fetch_stats = {"requests": 0, "not_modified": 0, "fresh_hits": 0, "parses": 0, "text_hits": 0}
+
+
+class ResponseTooLarge(requests.RequestException):
+    """The response body exceeded FETCH_MAX_RESPONSE_BYTES."""
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one URL: text on success, error otherwise."""
+    index: int
+    url: str
+    text: str = None
+    error: Exception = None
+
+
+# Function to extract the paragraph text from an HTML page
+def extract_paragraph_text(content):
+    soup = BeautifulSoup(content, "html.parser")
+    return " ".join([p.get_text() for p in soup.find_all("p")])
+
+
+class FetchCache(SQLiteCache):
+    """On-disk HTTP cache for webpages.
+
+    responses keeps, per URL, the validators (ETag / Last-Modified) and the
+    hash of the last body. texts keeps the extracted <p> text per content
+    hash, so an unchanged body is never parsed twice, even under a new URL.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS responses ("
+        " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+        " content_hash TEXT NOT NULL, fetched_at REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS texts ("
+        " content_hash TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)",
+    )
+
+    def __init__(self, path=FETCH_CACHE_PATH, max_bytes=FETCH_CACHE_MAX_BYTES):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+
+    def get_response(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("etag", "last_modified", "content_hash", "fetched_at"), row))
+
+    def put_response(self, url, etag, last_modified, content_hash):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, time.time()),
+            )
+            self._conn.commit()
+
+    def touch_response(self, url):
+        with self._lock:
+            self._conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def get_text(self, content_hash):
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM texts WHERE content_hash = ?", (content_hash,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE texts SET last_used = ? WHERE content_hash = ?", (time.time(), content_hash))
+                self._conn.commit()
+        return row[0] if row else None
+
+    def put_text(self, content_hash, text):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?)",
+                (content_hash, text, len(text.encode("utf-8")), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        evicted = self._evict_lru("texts", "content_hash", self.max_bytes)
+        self._conn.executemany("DELETE FROM responses WHERE content_hash = ?", [(key,) for key in evicted])
+
+
+_host_limits = {}
+_host_lock = threading.Lock()
+
+
+def _make_session():
+    # One pooled session for the process; the pool is sized so every
+    # fetch_many() worker can hold a connection without blocking
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=FETCH_WORKERS, pool_maxsize=FETCH_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = _make_session()
+
+
+def get_fetch_cache():
+    return FetchCache.shared()
+
+
+def _host_limit(url):
+    host = urlsplit(url).netloc.lower()
+    with _host_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(FETCH_PER_HOST)
+        return _host_limits[host]
+
+
+def _get(url, headers=None):
+    """GET url with timeouts and a body size cap; return (response, body)."""
+    with _host_limit(url):
+        with _session.get(url, headers=headers, timeout=FETCH_TIMEOUT, stream=True) as response:
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > FETCH_MAX_RESPONSE_BYTES:
+                raise ResponseTooLarge(f"{url} is {length} bytes (limit {FETCH_MAX_RESPONSE_BYTES})")
+            body = bytearray()
+            for block in response.iter_content(64 * 1024):
+                body += block
+                if len(body) > FETCH_MAX_RESPONSE_BYTES:
+                    raise ResponseTooLarge(f"{url} is larger than {FETCH_MAX_RESPONSE_BYTES} bytes")
+            return response, bytes(body)
+
+
+# Function to fetch a webpage's paragraph text through the cache
+def fetch_text(url, ttl=FETCH_CACHE_TTL):
+    """Return the <p> text of url, reusing cached work wherever possible.
+
+    A response fetched less than ttl seconds ago is served from disk with
+    no request at all. Older ones are revalidated with If-None-Match /
+    If-Modified-Since, and a 304 reuses the cached text. A 200 is only
+    parsed if its body hash has not been seen before. Raises
+    requests.RequestException on network or HTTP errors, timeouts and
+    bodies over FETCH_MAX_RESPONSE_BYTES.
+    """
+    cache = get_fetch_cache()
+    cached = cache.get_response(url)
+    if cached and time.time() - cached["fetched_at"] < ttl:
+        text = cache.get_text(cached["content_hash"])
+        if text is not None:
+            fetch_stats["fresh_hits"] += 1
+            return text
+
+    headers = {}
+    if cached and cache.get_text(cached["content_hash"]) is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    fetch_stats["requests"] += 1
+    response, body = _get(url, headers)
+    if response.status_code == 304 and headers:
+        text = cache.get_text(cached["content_hash"])
+        if text is not None:
+            fetch_stats["not_modified"] += 1
+            cache.touch_response(url)
+            return text
+        # The text was evicted in the meantime; fetch the full body again
+        fetch_stats["requests"] += 1
+        response, body = _get(url)
+    response.raise_for_status()
+
+    content_hash = hashlib.sha256(body).hexdigest()
+    text = cache.get_text(content_hash)
+    if text is None:
+        fetch_stats["parses"] += 1
+        text = extract_paragraph_text(body)
+        cache.put_text(content_hash, text)
+    else:
+        fetch_stats["text_hits"] += 1
+    cache.put_response(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), content_hash)
+    return text
+
+
+# Function to fetch several webpages at once
+def fetch_many(urls, max_workers=FETCH_WORKERS, ttl=FETCH_CACHE_TTL):
+    """Fetch urls concurrently and yield a FetchResult for each as it completes.
+
+    Each result carries the URL's position in urls, so callers can place it
+    while the slower pages are still loading. Requests to the same host are
+    limited to FETCH_PER_HOST at a time. A failing URL yields a result with
+    error set instead of raising, so the other pages are still returned.
+    """
+    urls = list(urls)
+    if not urls:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        futures = {executor.submit(fetch_text, url, ttl): i for i, url in enumerate(urls)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                yield FetchResult(i, urls[i], text=future.result())
+            except Exception as e:
+                yield FetchResult(i, urls[i], error=e)
+
+
+def fetch_all(urls, max_workers=FETCH_WORKERS, ttl=FETCH_CACHE_TTL):
+    """Fetch urls concurrently and return their FetchResults in input order."""
+    urls = list(urls)
+    results = [None] * len(urls)
+    for result in fetch_many(urls, max_workers, ttl):
+        results[result.index] = result
+    return results
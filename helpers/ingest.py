@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from helpers.embeddings import (
+    EMBEDDING_MODEL,
+    MAX_BATCH_SIZE,
+    MAX_BATCH_TOKENS,
+    batch_by_tokens,
+    embed_texts,
+    truncate_for_embedding,
+)
+
+
+def _prepare(documents, model):
+    """Clip each document to the embedding input limit and attach its token count."""
+    for doc in documents:
+        text, n_tokens = truncate_for_embedding(doc["text"], model=model)
+        yield {**doc, "text": text}, n_tokens
+
+
+def _embed_batch(client, batch, model):
+    return batch, embed_texts(client, [doc["text"] for doc in batch], model=model)
+
+
+def _write_batch(collection, batch, embeddings):
+    metadatas = [doc.get("metadata") for doc in batch]
+    collection.upsert(
+        ids=[doc["id"] for doc in batch],
+        documents=[doc["text"] for doc in batch],
+        embeddings=embeddings,
+        metadatas=metadatas if all(metadatas) else None,
+    )
+
+
+# Function to embed and store documents in bulk
+def ingest_documents(collection, documents, client, model=EMBEDDING_MODEL,
+                     max_batch_tokens=MAX_BATCH_TOKENS, max_batch_size=MAX_BATCH_SIZE,
+                     max_workers=4, on_batch=None):
+    """Embed documents in token-bounded batches and upsert them into a collection.
+
+    documents is an iterable of dicts with "id", "text" and an optional
+    "metadata" dict; it is consumed lazily, so a generator can keep producing
+    documents while earlier batches are being embedded. At most max_workers
+    embedding requests are in flight at once, and every finished batch is
+    written with a single upsert call. on_batch, if given, is called with
+    each batch of documents right after it has been written, e.g. to record
+    progress.
+
+    Returns a dict with the number of documents and batches written, the
+    elapsed seconds and the resulting docs/sec throughput.
+    """
+    start = time.perf_counter()
+    n_docs = n_batches = 0
+    batches = batch_by_tokens(
+        _prepare(documents, model), max_tokens=max_batch_tokens, max_items=max_batch_size
+    )
+
+    def write(futures):
+        nonlocal n_docs, n_batches
+        for future in futures:
+            batch, embeddings = future.result()
+            _write_batch(collection, batch, embeddings)
+            if on_batch:
+                on_batch(batch)
+            n_docs += len(batch)
+            n_batches += 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for batch in batches:
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write(done)
+            pending.add(executor.submit(_embed_batch, client, batch, model))
+        write(pending)
+
+    seconds = time.perf_counter() - start
+    return {
+        "docs": n_docs,
+        "batches": n_batches,
+        "seconds": seconds,
+        "docs_per_sec": n_docs / seconds if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,69 @@
+from helpers.providers import run_background
+
+SUMMARY_MAX_TOKENS = 200
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Update the summary with the new messages below, keeping every fact, name and open question "
+    "that later questions may refer to. Answer with the updated summary only, in at most 150 words."
+    "\n\nCurrent summary:\n{summary}\n\nNew messages:\n{messages}"
+)
+
+
+def _length_option(provider, max_tokens):
+    if provider.name == "Gemini":
+        return {"max_output_tokens": max_tokens}
+    return {"max_tokens": max_tokens}
+
+
+async def _fold(provider, summary, messages, max_tokens):
+    lines = "\n".join(f"{'user' if msg['role'] == 'user' else 'assistant'}: {msg['content']}" for msg in messages)
+    prompt = SUMMARY_PROMPT.format(summary=summary or "(empty)", messages=lines)
+    stream = provider.stream([{"role": "user", "content": prompt}], **_length_option(provider, max_tokens))
+    async for _ in stream:
+        pass
+    return stream.text
+
+
+class RollingSummary:
+    """Conversation memory that folds each new exchange into a running summary.
+
+    Keep one per session (e.g. in st.session_state). update() is called once
+    an answer has been shown and folds the messages added since the last
+    fold into the summary on the provider loop, in the background. context()
+    never waits for that: it returns the latest finished summary plus the
+    messages it doesn't cover yet. Only chat messages are summarized; the
+    context documents are never part of the history passed in.
+    """
+
+    def __init__(self, max_tokens=SUMMARY_MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self.summary = ""
+        self.folded = 0
+        self._future = None
+        self._pending_folded = 0
+
+    def _collect(self):
+        if self._future is None or not self._future.done():
+            return
+        try:
+            summary = self._future.result()
+            if summary:
+                self.summary = summary
+                self.folded = self._pending_folded
+        except Exception:
+            # Keep the previous summary; the unfolded messages are retried on the next update
+            pass
+        self._future = None
+
+    def context(self, messages):
+        """Return (summary, recent messages not yet folded into it)."""
+        self._collect()
+        return self.summary, messages[self.folded:]
+
+    def update(self, provider, messages):
+        """Fold messages added since the last fold into the summary in the background."""
+        self._collect()
+        if self._future is not None or len(messages) <= self.folded:
+            return
+        self._pending_folded = len(messages)
+        self._future = run_background(_fold(provider, self.summary, messages[self.folded:], self.max_tokens))
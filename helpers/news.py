@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from helpers.bm25 import BM25Index, normalize_query, reciprocal_rank_fusion, tokenize
+from helpers.embeddings import embed_text
+from helpers.sync import content_hash, fingerprint_metadata, get_fingerprints, index_version, sync_collection
+
+NEWS_CSV_PATH = os.path.join("HWs", "Example_news_info_for_testing.csv")
+NEWS_BM25_PATH = os.path.join(".cache", "news_bm25.json")
+# Progress of the last news sync, so an interrupted one resumes where it stopped
+NEWS_SYNC_CHECKPOINT_PATH = os.path.join(".cache", "news_sync.json")
+# Rows read from the CSV at a time
+NEWS_CSV_CHUNK_ROWS = int(os.environ.get("NEWS_CSV_CHUNK_ROWS", 5000))
+_NEWS_COLUMNS = ['URL', 'Date', 'Document', 'company_name', 'days_since_2000']
+# Candidates taken from each of the keyword and vector rankings before fusion
+HYBRID_CANDIDATES = 50
+# Scores are weighted by 0.5 ** (age in days / half-life), age counted from
+# the newest candidate; a half-life of 0 turns recency weighting off
+NEWS_RECENCY_HALF_LIFE_DAYS = 30
+# Shapes the stored metadata; part of each row's fingerprint (see helpers.sync)
+NEWS_INDEX_VARIANT = "dated"
+
+
+# Function to stream the rows of the news CSV
+def iter_news_rows(csv_path=NEWS_CSV_PATH, chunk_rows=NEWS_CSV_CHUNK_ROWS):
+    """Yield (url, date, text, company, days_since_2000) for every CSV row.
+
+    The file is read chunk_rows rows at a time, so only one chunk is in
+    memory however large the CSV is.
+    """
+    for chunk in pd.read_csv(csv_path, usecols=_NEWS_COLUMNS, chunksize=chunk_rows):
+        for url, date, text, company, days in chunk[_NEWS_COLUMNS].itertuples(index=False, name=None):
+            yield url, date, text, str(company).strip(), int(days)
+
+
+# Function to read the news CSV as documents
+def iter_news_documents(csv_path=NEWS_CSV_PATH, resume_rows=0):
+    """Yield {"id", "text", "metadata", "row"} for every row of the news CSV, keyed by URL.
+
+    Metadata holds the ISO "date", the numeric "days_since_2000" and the
+    "company", so date ranges and companies can be filtered in the index.
+    The first resume_rows rows are known to be stored already and are
+    yielded as {"id", "row", "unchanged": True} without fingerprinting.
+    """
+    mtime = os.path.getmtime(csv_path)
+    for row, (url, date, text, company, days) in enumerate(iter_news_rows(csv_path)):
+        if row < resume_rows:
+            yield {"id": url, "row": row, "unchanged": True}
+            continue
+        yield {
+            "id": url,
+            "text": text,
+            "row": row,
+            "metadata": {
+                "date": date,
+                "days_since_2000": days,
+                "company": company,
+                **fingerprint_metadata(f"{url}\0{date}\0{text}\0{company}\0{days}", mtime, NEWS_INDEX_VARIANT),
+            },
+        }
+
+
+def _csv_identity(csv_path):
+    """What a checkpoint is valid for: the CSV's size and mtime, and the index version."""
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "index_version": index_version(NEWS_INDEX_VARIANT)}
+
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _save_checkpoint(checkpoint, path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+    os.replace(f"{path}.tmp", path)
+
+
+# Function to sync a collection with the news CSV
+def sync_news_collection(collection, client, csv_path=NEWS_CSV_PATH, checkpoint_path=NEWS_SYNC_CHECKPOINT_PATH,
+                         **ingest_kwargs):
+    """Embed only new or changed news rows and drop rows that were removed.
+
+    The CSV is streamed in chunks, duplicate URLs are skipped, and changed
+    rows are embedded in batches and upserted by URL. After every written
+    batch, checkpoint_path records how many leading CSV rows are settled
+    (stored or skipped) and how many rows the collection held; if a run
+    stops midway, the next one trusts those rows and continues after them.
+    Once a sync has finished, an unchanged CSV is not read again.
+
+    The checkpoint belongs to one collection: keep it next to the stored
+    vectors (one file per backend). It is only trusted while the CSV is
+    unchanged and the collection still has the recorded number of rows;
+    otherwise every row is compared by fingerprint again. ingest_kwargs
+    are passed on to ingest_documents (batch sizes, workers).
+
+    Memory, not the CSV, bounds the corpus size. Streaming keeps the CSV
+    out of memory, but the sync holds every URL seen, and the default numpy
+    store keeps every row's id, text and metadata in memory. With that
+    store, a few hundred thousand rows is a practical ceiling. Past that,
+    set VECTOR_STORE=chroma.
+    """
+    source = _csv_identity(csv_path)
+    checkpoint = _load_checkpoint(checkpoint_path)
+    if checkpoint.get("source") != source or checkpoint.get("count") != collection.count():
+        checkpoint = {"source": source, "rows": 0, "documents": None, "count": collection.count()}
+    if checkpoint["documents"] is not None:
+        return {
+            "changed": 0, "unchanged": checkpoint["documents"], "duplicates": checkpoint["duplicates"], "removed": 0,
+            "ingest": {"docs": 0, "batches": 0, "seconds": 0.0, "docs_per_sec": 0.0},
+        }
+
+    read = checkpoint["rows"]
+    pending = set()
+
+    def documents():
+        nonlocal read
+        for doc in iter_news_documents(csv_path, resume_rows=checkpoint["rows"]):
+            yield doc
+            # Once the next row is asked for, this one was skipped or is pending
+            read = doc["row"] + 1
+
+    def track(docs):
+        for doc in docs:
+            pending.add(doc["row"])
+            yield doc
+
+    def written(batch):
+        pending.difference_update(doc["row"] for doc in batch)
+        checkpoint.update(rows=min(pending) if pending else read, count=collection.count())
+        _save_checkpoint(checkpoint, checkpoint_path)
+
+    known = get_fingerprints(collection, NEWS_INDEX_VARIANT)
+    stats = sync_collection(collection, documents(), client, known=known, split=track, on_batch=written,
+                            **ingest_kwargs)
+    checkpoint.update(rows=read, documents=stats["changed"] + stats["unchanged"], duplicates=stats["duplicates"],
+                      count=collection.count())
+    _save_checkpoint(checkpoint, checkpoint_path)
+    return stats
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Function to load the keyword index of the news CSV, building it when the CSV changed
+def load_news_bm25(csv_path=NEWS_CSV_PATH, index_path=NEWS_BM25_PATH):
+    """Return a BM25Index over company_name + Document, tagged by company.
+
+    The index is stored at index_path with a fingerprint of the CSV
+    contents and rebuilt only when that fingerprint no longer matches.
+    The CSV is streamed and only the first row of each URL is indexed.
+    """
+    fingerprint = content_hash(_file_digest(csv_path), "bm25")
+    if os.path.exists(index_path):
+        index = BM25Index.load(index_path)
+        if index.fingerprint == fingerprint:
+            return index
+
+    seen = set()
+
+    def documents():
+        for url, _, text, company, _ in iter_news_rows(csv_path):
+            if url not in seen:
+                seen.add(url)
+                yield url, f"{company} {text}", company
+
+    index = BM25Index.build(documents(), fingerprint=fingerprint)
+    index.save(index_path)
+    return index
+
+
+# Function to build a metadata filter for news queries
+def news_filter(company=None, start_day=None, end_day=None):
+    """Return a where filter for a company and a days_since_2000 range, or None for no filter."""
+    clauses = []
+    if company:
+        clauses.append({"company": company})
+    if start_day is not None:
+        clauses.append({"days_since_2000": {"$gte": start_day}})
+    if end_day is not None:
+        clauses.append({"days_since_2000": {"$lte": end_day}})
+    if len(clauses) > 1:
+        return {"$and": clauses}
+    return clauses[0] if clauses else None
+
+
+def _by_recency(scored, half_life_days):
+    """Sort [(id, score, metadata)] by score x recency weight, best first."""
+    if half_life_days and scored:
+        newest = max(meta.get("days_since_2000", 0) for _, _, meta in scored)
+        scored = [(doc_id, score * 0.5 ** ((newest - meta.get("days_since_2000", 0)) / half_life_days), meta)
+                  for doc_id, score, meta in scored]
+    return [doc_id for doc_id, _, _ in sorted(scored, key=lambda item: item[1], reverse=True)]
+
+
+# Function to search the news with keywords and vectors together
+def hybrid_search(collection, client, bm25, query, k=3, candidates=HYBRID_CANDIDATES, where=None,
+                  half_life_days=NEWS_RECENCY_HALF_LIFE_DAYS):
+    """Return (results, mode) for the k news rows that best match query.
+
+    An exact company name, or a single term that occurs in the corpus, is
+    answered from the keyword index alone ("keyword" mode, no embedding
+    call). Anything else ranks candidates by BM25 and by embedding
+    similarity and merges the two rankings with reciprocal rank fusion
+    ("hybrid" mode). where (see news_filter) restricts the keyword scoring
+    to the matching rows and is applied inside the vector query. Each
+    ranking orders its candidates by score times a recency decay with the
+    given half-life. results has the Chroma query layout.
+    """
+    # With a filter, only the matching rows are scored, so every keyword candidate passes it
+    allowed = set(collection.get(where=where, include=[])["ids"]) if where else None
+    tagged = bm25.tags.get(normalize_query(query))
+    terms = tokenize(query)
+    if tagged:
+        tagged_ids = set(tagged) if allowed is None else set(tagged) & allowed
+        keyword_hits, mode = bm25.search(query, len(bm25.ids), tagged_ids), "keyword"
+    elif len(terms) == 1 and terms[0] in bm25:
+        keyword_hits, mode = bm25.search(query, candidates, allowed), "keyword"
+    else:
+        keyword_hits, mode = bm25.search(query, candidates, allowed), "hybrid"
+
+    # Read the keyword candidates' dates
+    keyword_scores = dict(keyword_hits)
+    found = collection.get(ids=list(keyword_scores), include=["metadatas"]) if keyword_scores else None
+    keyword_ranking = _by_recency(
+        [(doc_id, keyword_scores[doc_id], meta or {}) for doc_id, meta in zip(found["ids"], found["metadatas"])]
+        if found else [],
+        half_life_days,
+    )
+
+    if mode == "keyword":
+        ids = keyword_ranking[:k]
+    else:
+        vector_results = collection.query(
+            query_embeddings=[embed_text(client, query)],
+            include=["metadatas", "distances"],
+            n_results=candidates,
+            **({"where": where} if where else {})
+        )
+        vector_ranking = _by_recency(
+            [(doc_id, 1 - distance, meta or {}) for doc_id, distance, meta in zip(
+                vector_results["ids"][0], vector_results["distances"][0], vector_results["metadatas"][0])],
+            half_life_days,
+        )
+        ids = reciprocal_rank_fusion([keyword_ranking, vector_ranking])[:k]
+
+    found = collection.get(ids=ids, include=["documents", "metadatas"]) if ids else {"ids": []}
+    rows = dict(zip(found["ids"], zip(found.get("documents") or [], found.get("metadatas") or [])))
+    ids = [doc_id for doc_id in ids if doc_id in rows]
+    results = {
+        "ids": [ids],
+        "documents": [[rows[doc_id][0] for doc_id in ids]],
+        "metadatas": [[rows[doc_id][1] for doc_id in ids]],
+    }
+    return results, mode
+
+
+# Function to list the companies and date range of the news CSV
+def news_facets(csv_path=NEWS_CSV_PATH):
+    """Return {"companies": sorted names, "first_day", "last_day"} (days since 2000)."""
+    companies, days = set(), []
+    for chunk in pd.read_csv(csv_path, usecols=['company_name', 'days_since_2000'], chunksize=NEWS_CSV_CHUNK_ROWS):
+        companies.update(chunk['company_name'].dropna().str.strip())
+        days += [chunk['days_since_2000'].min(), chunk['days_since_2000'].max()]
+    return {"companies": sorted(companies), "first_day": int(min(days)), "last_day": int(max(days))}
@@ -0,0 +1,62 @@
+import hashlib
+
+from helpers.chunking import chunk_text
+from helpers.embeddings import batch_by_tokens, embed_text, embed_texts
+
+# How many chunks are considered per question and how many tokens of them
+# may go into the prompt
+RETRIEVAL_TOP_K = 8
+CONTEXT_TOKEN_BUDGET = 2000
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PageIndex:
+    """In-memory chunk index over fetched pages, kept per session.
+
+    Each page is chunked and embedded once per content hash (the vectors
+    also go through the on-disk embedding cache), so rerunning the script
+    or asking another question reuses the index. Embeddings from the
+    OpenAI embedding models are unit length, so a dot product ranks
+    chunks by cosine similarity.
+    """
+
+    def __init__(self):
+        self.pages = {}
+
+    def add(self, client, text):
+        """Index text if its content hasn't been indexed yet; return its content hash."""
+        key = content_hash(text)
+        if key not in self.pages:
+            chunks = list(chunk_text(text))
+            embeddings = []
+            for batch in batch_by_tokens([(chunk, chunk["tokens"]) for chunk in chunks]):
+                embeddings += embed_texts(client, [chunk["text"] for chunk in batch])
+            self.pages[key] = list(zip(chunks, embeddings))
+        return key
+
+    def select(self, client, question, keys, k=RETRIEVAL_TOP_K, token_budget=CONTEXT_TOKEN_BUDGET):
+        """Return the chunks of the pages in keys that best match question.
+
+        The k closest chunks are taken best first while they fit in
+        token_budget (the best one is always kept), then returned grouped
+        by page and in reading order.
+        """
+        query = embed_text(client, question)
+        scored = []
+        for page_number, key in enumerate(keys):
+            for chunk, embedding in self.pages.get(key, []):
+                score = sum(a * b for a, b in zip(query, embedding))
+                scored.append((score, page_number, chunk))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        selected = []
+        used = 0
+        for score, page_number, chunk in scored[:k]:
+            if selected and used + chunk["tokens"] > token_budget:
+                continue
+            selected.append((page_number, chunk["index"], chunk))
+            used += chunk["tokens"]
+        return [chunk for _, _, chunk in sorted(selected, key=lambda item: item[:2])]
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF for reading PDFs
+
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(".cache", "pdf_text"))
+# PDFs with at least PDF_PARALLEL_MIN_PAGES pages are extracted by
+# PDF_WORKERS processes, each taking a contiguous page range.
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 64))
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", os.cpu_count() or 1))
+# How many uploaded PDFs stay open in memory
+OPEN_PDFS_MAX = 8
+
+
+def file_hash(file):
+    """sha256 of an uploaded file (or bytes) without copying its contents."""
+    data = file.getbuffer() if hasattr(file, "getbuffer") else file
+    return hashlib.sha256(data).hexdigest()
+
+
+def _extract_range(data, start, stop):
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+
+class PdfText:
+    """Text of a PDF, one string per page, extracted on demand.
+
+    page(i) and pages(start, stop) only extract the pages asked for;
+    extract_all() fills in the rest, across processes for large PDFs, and
+    stores the page texts under PDF_CACHE_DIR so the same file is never
+    extracted twice. Use open_pdf() rather than creating this directly.
+    """
+
+    def __init__(self, data, digest, cache_dir=PDF_CACHE_DIR):
+        self.digest = digest
+        self._data = data
+        self._cache_path = os.path.join(cache_dir, f"{digest}.json")
+        self._text = None
+        if os.path.exists(self._cache_path):
+            with open(self._cache_path, encoding="utf-8") as file:
+                self._pages = json.load(file)["pages"]
+            self._data = None
+        else:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                self._pages = [None] * doc.page_count
+
+    @property
+    def page_count(self):
+        return len(self._pages)
+
+    def page(self, i):
+        return self.pages(i, i + 1)[0]
+
+    def pages(self, start=0, stop=None):
+        """Return the text of pages start..stop-1, extracting the ones not seen yet."""
+        stop = self.page_count if stop is None else min(stop, self.page_count)
+        missing = [i for i in range(start, stop) if self._pages[i] is None]
+        if missing:
+            first, last = missing[0], missing[-1] + 1
+            for i, text in enumerate(_extract_range(self._data, first, last), start=first):
+                self._pages[i] = text
+        return self._pages[start:stop]
+
+    def extract_all(self, workers=PDF_WORKERS, parallel_min_pages=PDF_PARALLEL_MIN_PAGES):
+        """Extract every page not extracted yet and store the result on disk."""
+        if self._data is None:
+            return self
+        if workers > 1 and self.page_count >= parallel_min_pages:
+            step = -(-self.page_count // workers)
+            ranges = [(start, min(start + step, self.page_count)) for start in range(0, self.page_count, step)]
+            data = bytes(self._data)
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(_extract_range, data, start, stop) for start, stop in ranges]
+                for (start, stop), future in zip(ranges, futures):
+                    self._pages[start:stop] = future.result()
+        else:
+            self.pages()
+        os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
+        with open(self._cache_path, "w", encoding="utf-8") as file:
+            json.dump({"pages": self._pages}, file)
+        self._data = None
+        return self
+
+    @property
+    def text(self):
+        """The whole document, joined once."""
+        if self._text is None:
+            self._text = "".join(self.extract_all()._pages)
+        return self._text
+
+
+_open_pdfs = OrderedDict()
+_open_pdfs_lock = threading.Lock()
+
+
+# Function to open an uploaded PDF, reusing earlier extractions of the same file
+def open_pdf(file):
+    """Return the PdfText for an uploaded file or bytes, cached by file hash.
+
+    The last OPEN_PDFS_MAX files stay open in memory, so reruns with the
+    same upload do no work; after extract_all() a file's pages are also on
+    disk and are never parsed again.
+    """
+    digest = file_hash(file)
+    with _open_pdfs_lock:
+        if digest in _open_pdfs:
+            _open_pdfs.move_to_end(digest)
+            return _open_pdfs[digest]
+    data = file.getvalue() if hasattr(file, "getvalue") else bytes(file)
+    pdf = PdfText(data, digest)
+    with _open_pdfs_lock:
+        _open_pdfs[digest] = pdf
+        while len(_open_pdfs) > OPEN_PDFS_MAX:
+            _open_pdfs.popitem(last=False)
+    return pdf
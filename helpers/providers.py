@@ -0,0 +1,295 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+
+from helpers.clients import get_async_cohere_client, get_async_openai_client, get_gemini_client, get_mistral_client
+
+
+@dataclass
+class StreamChunk:
+    """One piece of a streamed response, normalized across providers."""
+    text: str = ""
+    usage: dict = field(default_factory=dict)
+
+
+class ProviderStream:
+    """A streamed response: iterate it (sync or async) for StreamChunks.
+
+    While and after iterating, text holds the response so far, usage the
+    token counts the provider reported ("prompt_tokens", "completion_tokens"),
+    and time_to_first_token / total_latency the timings in seconds.
+    """
+
+    def __init__(self, provider, messages, options):
+        self.provider = provider
+        self.messages = messages
+        self.options = options
+        self.usage = {}
+        self.started_at = None
+        self.first_token_at = None
+        self.finished_at = None
+        self._parts = []
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    @property
+    def time_to_first_token(self):
+        return self.first_token_at - self.started_at if self.first_token_at else None
+
+    @property
+    def total_latency(self):
+        return self.finished_at - self.started_at if self.finished_at else None
+
+    async def _run(self):
+        self.started_at = time.perf_counter()
+        async for event in self.provider._events(self.messages, **self.options):
+            chunk = self.provider._parse(event)
+            if chunk is None:
+                continue
+            if chunk.usage:
+                self.usage.update(chunk.usage)
+            if chunk.text:
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                self._parts.append(chunk.text)
+                yield chunk
+        self.finished_at = time.perf_counter()
+
+    def __aiter__(self):
+        return self._run()
+
+    def __iter__(self):
+        return iterate_sync(self._run())
+
+
+class Provider:
+    """Base class for chat providers.
+
+    Subclasses implement _events(), an async generator of raw SDK stream
+    events, and _parse(), which turns one event into a StreamChunk (or None
+    for events that carry nothing).
+    """
+    name = "provider"
+
+    def __init__(self, model):
+        self.model = model
+
+    def stream(self, messages, **options):
+        """Start a streamed completion for OpenAI-style {"role", "content"} messages."""
+        return ProviderStream(self, messages, options)
+
+    def complete(self, messages, **options):
+        """Run a completion to the end and return the ProviderStream with the full text."""
+        stream = self.stream(messages, **options)
+        for _ in stream:
+            pass
+        return stream
+
+    async def _events(self, messages, **options):
+        raise NotImplementedError
+        yield
+
+    def _parse(self, event):
+        raise NotImplementedError
+
+
+class OpenAIProvider(Provider):
+    name = "OpenAI"
+
+    def __init__(self, api_key, model="gpt-4o-mini"):
+        super().__init__(model)
+        self.client = get_async_openai_client(api_key)
+
+    async def _events(self, messages, **options):
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **options,
+        )
+        async for chunk in stream:
+            yield chunk
+
+    def _parse(self, chunk):
+        usage = {}
+        if chunk.usage:
+            usage = {"prompt_tokens": chunk.usage.prompt_tokens, "completion_tokens": chunk.usage.completion_tokens}
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        return StreamChunk(text=text or "", usage=usage)
+
+
+class CohereProvider(Provider):
+    name = "Cohere"
+    ROLES = {"user": "USER", "assistant": "CHATBOT", "system": "SYSTEM"}
+
+    def __init__(self, api_key, model="command-r"):
+        super().__init__(model)
+        self.client = get_async_cohere_client(api_key)
+
+    async def _events(self, messages, **options):
+        options = {"temperature": 0, "max_tokens": 1500, **options}
+        async for event in self.client.chat_stream(
+            model=self.model,
+            message=messages[-1]['content'],
+            chat_history=[{"role": self.ROLES.get(m['role'], "CHATBOT"), "message": m['content']} for m in messages[:-1]],
+            **options,
+        ):
+            yield event
+
+    def _parse(self, event):
+        if event.event_type == "text-generation":
+            return StreamChunk(text=event.text)
+        if event.event_type == "stream-end":
+            units = event.response.meta.billed_units if event.response.meta else None
+            if units:
+                return StreamChunk(usage={"prompt_tokens": int(units.input_tokens or 0),
+                                          "completion_tokens": int(units.output_tokens or 0)})
+        return None
+
+
+class GeminiProvider(Provider):
+    name = "Gemini"
+
+    def __init__(self, api_key, model="gemini-pro"):
+        super().__init__(model)
+        self.client = get_gemini_client(api_key, model)
+
+    async def _events(self, messages, temperature=0, max_output_tokens=1500, **options):
+        import google.generativeai as genai
+        contents = [{"role": "user" if m["role"] == "user" else "model", "parts": [{"text": m["content"]}]}
+                    for m in messages]
+        response = await self.client.generate_content_async(
+            contents=contents,
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            ),
+            stream=True,
+            **options,
+        )
+        async for chunk in response:
+            yield chunk
+
+    def _parse(self, chunk):
+        usage = {}
+        if getattr(chunk, "usage_metadata", None):
+            usage = {"prompt_tokens": chunk.usage_metadata.prompt_token_count,
+                     "completion_tokens": chunk.usage_metadata.candidates_token_count}
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. a final safety-only chunk)
+            text = ""
+        return StreamChunk(text=text, usage=usage)
+
+
+class MistralProvider(Provider):
+    name = "Mistral"
+
+    def __init__(self, api_key, model="mistral-large-latest"):
+        super().__init__(model)
+        self.client = get_mistral_client(api_key)
+
+    async def _events(self, messages, **options):
+        response = await self.client.chat.stream_async(model=self.model, messages=messages, **options)
+        async for event in response:
+            yield event
+
+    def _parse(self, event):
+        data = event.data
+        usage = {}
+        if data.usage:
+            usage = {"prompt_tokens": data.usage.prompt_tokens, "completion_tokens": data.usage.completion_tokens}
+        text = data.choices[0].delta.content if data.choices else None
+        return StreamChunk(text=text if isinstance(text, str) else "", usage=usage)
+
+
+class FakeProvider(Provider):
+    """In-process provider that streams canned text pieces, for tests and benchmarks."""
+    name = "Fake"
+
+    def __init__(self, pieces=("Hello", " world"), first_token_delay=0.0, delay=0.0, usage=None, model="fake"):
+        super().__init__(model)
+        self.pieces = list(pieces)
+        self.first_token_delay = first_token_delay
+        self.delay = delay
+        self.usage = usage or {}
+
+    async def _events(self, messages, **options):
+        await asyncio.sleep(self.first_token_delay)
+        for i, piece in enumerate(self.pieces):
+            if i:
+                await asyncio.sleep(self.delay)
+            yield StreamChunk(text=piece)
+        yield StreamChunk(usage=self.usage)
+
+    def _parse(self, event):
+        return event
+
+
+PROVIDERS = {
+    "OpenAI": OpenAIProvider,
+    "Cohere": CohereProvider,
+    "Gemini": GeminiProvider,
+    "Mistral": MistralProvider,
+}
+
+
+# Function to build a provider by name
+def get_provider(name, api_key, model=None):
+    """Return a provider adapter; model defaults to the adapter's default model."""
+    provider_class = PROVIDERS[name]
+    return provider_class(api_key, model) if model else provider_class(api_key)
+
+
+# All provider streams run on one long-lived event loop in a background
+# thread. The async SDK clients keep their connection pools bound to that
+# loop, and the synchronous Streamlit script thread drives streams through
+# iterate_sync() / run_sync().
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="provider-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro):
+    """Run a coroutine on the provider loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def run_background(coro):
+    """Start a coroutine on the provider loop and return a concurrent.futures.Future without waiting."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def iterate_sync(async_iterator):
+    """Iterate an async iterator from synchronous code via the provider loop."""
+    loop = _get_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(async_iterator.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(async_iterator.aclose(), loop).result()
+
+
+# Function to render a stream into a Streamlit placeholder
+def write_stream(stream, placeholder):
+    """Show a ProviderStream in a placeholder as it arrives and return the full text."""
+    for _ in stream:
+        placeholder.markdown(stream.text + "▌")
+    placeholder.markdown(stream.text)
+    return stream.text
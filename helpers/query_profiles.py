@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from helpers.embeddings import EMBEDDING_MODEL, embed_texts
+
+QUERY_PROFILES_PATH = os.environ.get("QUERY_PROFILES_PATH", os.path.join(".cache", "query_profiles.json"))
+# Stored result lists are recomputed once they are older than this many seconds
+PROFILE_RESULTS_TTL = int(os.environ.get("PROFILE_RESULTS_TTL", 3600))
+
+# Named queries made of several keywords; each is searched with the centroid of its keyword embeddings
+QUERY_PROFILES = {
+    "legal": ["legal", "lawsuit", "regulation", "merger", "acquisition", "court", "law", "contract",
+              "legal precedent", "jurisdiction", "statutory", "litigation", "regulatory compliance",
+              "intellectual property", "antitrust"],
+}
+
+_lock = threading.Lock()
+
+
+def keywords_hash(keywords, model=EMBEDDING_MODEL):
+    return hashlib.sha256("\0".join([model, *keywords]).encode("utf-8")).hexdigest()
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _save(profiles, path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(profiles, file)
+    os.replace(f"{path}.tmp", path)
+
+
+# Function to get a profile's query vector, embedding its keywords only when they changed
+def get_profile_centroid(client, name, path=QUERY_PROFILES_PATH):
+    """Return the mean embedding of a profile's keywords.
+
+    All keywords are embedded in one batched call, and the centroid is
+    stored with the hash of the keyword list, so it is recomputed only
+    when QUERY_PROFILES[name] (or the embedding model) changes.
+    """
+    keywords = QUERY_PROFILES[name]
+    digest = keywords_hash(keywords)
+    with _lock:
+        profiles = _load(path)
+        stored = profiles.get(name)
+        if stored and stored["keywords_hash"] == digest:
+            return stored["centroid"]
+    embeddings = embed_texts(client, keywords)
+    centroid = [sum(values) / len(values) for values in zip(*embeddings)]
+    with _lock:
+        profiles = _load(path)
+        profiles[name] = {"keywords_hash": digest, "centroid": centroid}
+        _save(profiles, path)
+    return centroid
+
+
+# Function to get a profile's search results, reusing a recent stored copy
+def get_profile_results(collection, client, name, n_results=3, max_age=PROFILE_RESULTS_TTL,
+                        path=QUERY_PROFILES_PATH, refresh=False):
+    """Return the collection's query results for a profile (Chroma layout).
+
+    Results are stored next to the centroid and reused while they are
+    younger than max_age, were made from the same keywords and n_results,
+    and the collection still has the same number of rows. refresh forces
+    a new query, e.g. right after the collection was synced.
+    """
+    digest = keywords_hash(QUERY_PROFILES[name])
+    count = collection.count()
+    with _lock:
+        stored = _load(path).get(name, {}).get("results")
+    if (not refresh and stored and stored["keywords_hash"] == digest and stored["n_results"] == n_results
+            and stored["count"] == count and time.time() - stored["computed_at"] < max_age):
+        return stored["results"]
+
+    results = collection.query(
+        query_embeddings=[get_profile_centroid(client, name, path)],
+        include=['documents', 'metadatas'],
+        n_results=n_results
+    )
+    results = {key: results[key] for key in ("ids", "documents", "metadatas")}
+    with _lock:
+        profiles = _load(path)
+        profiles.setdefault(name, {})["results"] = {
+            "keywords_hash": digest, "n_results": n_results, "count": count,
+            "computed_at": time.time(), "results": results,
+        }
+        _save(profiles, path)
+    return results
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import threading
+
+_shared_lock = threading.Lock()
+
+
+class SQLiteCache:
+    """Base class for the on-disk caches.
+
+    Opens one SQLite connection in WAL mode that all threads share under
+    self._lock, and creates the tables listed in SCHEMA. shared() returns
+    one instance per class for the whole process.
+    """
+
+    SCHEMA = ()
+    _instance = None
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    @classmethod
+    def shared(cls):
+        """Return the process-wide instance of this cache, opened with its default settings."""
+        with _shared_lock:
+            if cls.__dict__.get("_instance") is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _evict_lru(self, table, key_column, max_bytes):
+        """Keep a table's "size" column under max_bytes, dropping least recently used rows first.
+
+        Once the total exceeds max_bytes, rows are deleted in "last_used"
+        order until it is back under 90% of max_bytes. Returns the keys of
+        the deleted rows. Call with self._lock held; the caller commits.
+        """
+        (total,) = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()
+        if total <= max_bytes:
+            return []
+        target = total - int(max_bytes * 0.9)
+        freed = 0
+        evicted = []
+        for key, size in self._conn.execute(f"SELECT {key_column}, size FROM {table} ORDER BY last_used"):
+            if freed >= target:
+                break
+            evicted.append((key,))
+            freed += size
+        self._conn.executemany(f"DELETE FROM {table} WHERE {key_column} = ?", evicted)
+        return [key for key, in evicted]
@@ -0,0 +1,216 @@
+import functools
+import html
+import importlib.util
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bs4 import BeautifulSoup
+
+from helpers.boilerplate import boilerplate_digest, load_or_learn_boilerplate, strip_boilerplate
+from helpers.chunking import chunk_documents
+from helpers.sync import fingerprint_metadata, get_fingerprints, sync_collection
+from helpers.tokens import count_tokens
+
+SU_ORGS_PATH = os.path.join("HWs", "su_orgs")
+# Template of the DOM text, learned once; only pages without embedded JSON use it
+BOILERPLATE_PATH = os.path.join(".cache", "su_orgs_dom_boilerplate.json")
+
+# lxml is much faster than the pure-Python parser for the HTML fallback
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+PARSE_WORKERS = int(os.environ.get("SU_ORGS_PARSE_WORKERS", os.cpu_count() or 1))
+
+APP_STATE_MARKER = "window.initialAppState = "
+SOCIAL_MEDIA_FIELDS = {
+    "externalWebsite": "Website",
+    "facebookUrl": "Facebook",
+    "instagramUrl": "Instagram",
+    "linkedInUrl": "LinkedIn",
+    "twitterUrl": "Twitter",
+    "youtubeUrl": "YouTube",
+}
+
+
+def _strip_tags(fragment):
+    """Turn a small HTML fragment (e.g. an org description) into plain text lines."""
+    text = re.sub(r"<(br|/p|/div|/li|/h\d)\s*/?>", "\n", fragment or "", flags=re.IGNORECASE)
+    text = html.unescape(re.sub(r"<[^>]+>", "", text))
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+# Function to pull the organization record out of a campuslabs page
+def extract_organization(page):
+    """Return the organization dict embedded in window.initialAppState, or None.
+
+    Only the JSON blob is decoded; the rest of the page is never parsed.
+    """
+    start = page.find(APP_STATE_MARKER)
+    if start == -1:
+        return None
+    try:
+        state, _ = json.JSONDecoder().raw_decode(page, start + len(APP_STATE_MARKER))
+    except ValueError:
+        return None
+    return ((state or {}).get("preFetchedData") or {}).get("organization")
+
+
+# Function to turn an organization record into document text and metadata
+def organization_document(org):
+    """Return (text, metadata) for an organization from window.initialAppState."""
+    categories = [c.get("name", "") for c in org.get("categories") or [] if c.get("name")]
+    contact = org.get("primaryContact") or {}
+    contact_name = " ".join(filter(None, [contact.get("preferredFirstName") or contact.get("firstName"),
+                                          contact.get("lastName")]))
+    social = org.get("socialMedia") or {}
+    links = [f"{label}: {social[field]}" for field, label in SOCIAL_MEDIA_FIELDS.items() if social.get(field)]
+
+    lines = [f"Organization: {org.get('name', '')}"]
+    if org.get("shortName"):
+        lines.append(f"Short name: {org['shortName']}")
+    if org.get("summary"):
+        lines.append(f"Summary: {org['summary']}")
+    description = _strip_tags(org.get("description"))
+    if description:
+        lines.append(f"Description:\n{description}")
+    if categories:
+        lines.append(f"Categories: {', '.join(categories)}")
+    if org.get("email"):
+        lines.append(f"Email: {org['email']}")
+    if contact_name:
+        lines.append(f"Primary contact: {contact_name} ({contact.get('primaryEmailAddress') or 'no email'})")
+    lines.extend(links)
+
+    metadata = {
+        "name": org.get("name") or "",
+        "short_name": org.get("shortName") or "",
+        "email": org.get("email") or "",
+        "categories": ", ".join(categories),
+        "status": org.get("status") or "",
+    }
+    return "\n".join(lines), metadata
+
+
+def _parse_html(page):
+    soup = BeautifulSoup(page, HTML_PARSER)
+    # One line per text block, so chunking can break at block boundaries
+    return soup.get_text(separator='\n', strip=True), {}
+
+
+def _load_page(file_path, mtime, stored_hash=None, structured=True, boilerplate=frozenset()):
+    """Read, fingerprint and extract one page.
+
+    With structured=True only the embedded JSON is tried and None is
+    returned when the page has none; otherwise the full DOM is parsed,
+    lines of the learned boilerplate template are removed from its text,
+    and the number of tokens saved is recorded in the metadata. The
+    template is part of the fingerprint of DOM-parsed pages only.
+    """
+    html_file = os.path.basename(file_path)
+    with open(file_path, 'rb') as file:
+        raw = file.read()
+    variant = boilerplate_digest(boilerplate) if boilerplate and not structured else ""
+    fingerprint = fingerprint_metadata(raw, mtime, variant)
+    if stored_hash == fingerprint["content_hash"]:
+        return {"id": html_file, "unchanged": True}
+    page = raw.decode('utf-8')
+    if structured:
+        org = extract_organization(page)
+        if not org:
+            return None
+        text, metadata = organization_document(org)
+    else:
+        text, metadata = _parse_html(page)
+        if boilerplate:
+            stripped = strip_boilerplate(text, boilerplate)
+            metadata = {**metadata, "boilerplate_tokens": count_tokens(text) - count_tokens(stripped)}
+            text = stripped
+    return {
+        "id": html_file,
+        "text": text,
+        "metadata": {"filename": html_file, **metadata, **fingerprint},
+    }
+
+
+# Function to read the su_orgs HTML pages as documents
+def iter_su_orgs_documents(su_orgs_path=SU_ORGS_PATH, known=None, workers=PARSE_WORKERS, structured=True,
+                           boilerplate=frozenset()):
+    """Yield {"id", "text", "metadata"} for every HTML page in su_orgs_path.
+
+    known maps ids to stored fingerprints (see helpers.sync). Pages whose
+    mtime or raw-content hash matches are yielded as unchanged markers
+    without being parsed.
+
+    Pages with embedded organization JSON are extracted inline, which is
+    faster than shipping them to another process. Pages that need a full
+    HTML parse (all of them with structured=False) are fanned out over a
+    process pool of the given size and yielded as they finish, so a
+    consumer such as ingest_documents can start embedding meanwhile.
+
+    boilerplate is a learned template of the DOM text (see
+    helpers.boilerplate) whose lines are stripped from DOM-parsed pages. It
+    may be a callable returning the template, which is then only called
+    once a page actually needs the DOM parse.
+    """
+    known = known or {}
+    html_files = sorted(f for f in os.listdir(su_orgs_path) if f.endswith('.html'))
+    executor = None
+    futures = []
+    try:
+        for html_file in html_files:
+            file_path = os.path.join(su_orgs_path, html_file)
+            stored = known.get(html_file)
+            mtime = os.path.getmtime(file_path)
+            if stored and stored["mtime"] == mtime:
+                yield {"id": html_file, "unchanged": True}
+                continue
+            job = (file_path, mtime, stored and stored["content_hash"])
+            doc = _load_page(*job, structured=True) if structured else None
+            if doc:
+                yield doc
+                continue
+            if callable(boilerplate):
+                boilerplate = boilerplate()
+            if workers <= 1:
+                yield _load_page(*job, structured=False, boilerplate=boilerplate)
+            else:
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                futures.append(executor.submit(_load_page, *job, structured=False, boilerplate=boilerplate))
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+# Function to load the su_orgs DOM template, learning it from the corpus on first use
+def get_su_orgs_boilerplate(su_orgs_path=SU_ORGS_PATH, path=BOILERPLATE_PATH):
+    return load_or_learn_boilerplate(
+        path, lambda: (doc["text"] for doc in iter_su_orgs_documents(su_orgs_path, structured=False))
+    )
+
+
+# Function to sync a collection with the su_orgs pages
+def sync_su_orgs_collection(collection, client, su_orgs_path=SU_ORGS_PATH):
+    """Chunk and embed only new or changed su_orgs pages and drop pages that were removed.
+
+    Pages without embedded JSON are DOM-parsed and have the template text
+    shared by most pages' DOM stripped before chunking; the returned stats
+    include the tokens this saved on the re-indexed pages. The template is
+    only loaded (or learned) when such a page needs re-indexing.
+    """
+    # Fingerprints of JSON pages carry no variant, so they keep the mtime fast path
+    known = get_fingerprints(collection)
+    savings = {"boilerplate_tokens": 0, "tokens": 0}
+
+    def documents():
+        boilerplate = functools.partial(get_su_orgs_boilerplate, su_orgs_path)
+        for doc in iter_su_orgs_documents(su_orgs_path, known=known, boilerplate=boilerplate):
+            if not doc.get("unchanged"):
+                savings["boilerplate_tokens"] += doc["metadata"].get("boilerplate_tokens", 0)
+                savings["tokens"] += count_tokens(doc["text"])
+            yield doc
+
+    stats = sync_collection(collection, documents(), client, known=known, split=chunk_documents)
+    return {**stats, **savings}
@@ -0,0 +1,115 @@
+import asyncio
+
+from helpers.chunking import chunk_text
+from helpers.providers import run_sync
+from helpers.tokens import count_tokens
+
+LANGUAGE_INSTRUCTIONS = {
+    "English": "Please summarize the document in English.",
+    "French": "Veuillez résumer le document en français.",
+    "Spanish": "Por favor, resuma el documento en español."
+}
+
+SUMMARY_OPTIONS = [
+    "Summarize the document in 100 words",
+    "Summarize the document in 2 connecting paragraphs",
+    "Summarize the document in 5 bullet points"
+]
+
+# Documents above SINGLE_PASS_MAX_TOKENS are summarized map-reduce style:
+# split into SECTION_TOKENS sections, each summarized on its own (at most
+# MAP_CONCURRENCY at a time), then the section notes are combined.
+SINGLE_PASS_MAX_TOKENS = 6000
+SECTION_TOKENS = 3000
+MAP_CONCURRENCY = 4
+SECTION_INSTRUCTION = ("This is part {index} of {total} of a longer document. Write concise notes on its key "
+                       "facts, names and figures, without an introduction.")
+
+
+# Function to build the summary prompt in the shape each provider was tuned for
+def summary_messages(provider, document, summary_instruction, language_instruction):
+    if provider.name == "OpenAI":
+        content = f"Here's a document: {document} \n\n---\n\n {summary_instruction} {language_instruction}"
+    else:
+        content = f"{language_instruction} {summary_instruction} \n\n\n---\n\n Document: {document}\n\n---\n\n"
+    return [{"role": "user", "content": content}]
+
+
+def _options(provider):
+    if provider.name == "Cohere":
+        return {"prompt_truncation": 'AUTO', "connectors": [], "documents": []}
+    return {}
+
+
+def summary_instruction_for(summary_option):
+    """Turn one of SUMMARY_OPTIONS into the instruction sent with the document."""
+    return summary_option.replace("Summarize the document", "Summarize this document")
+
+
+# Function to generate a streamed summary with any provider
+def generate_summary(provider, document, summary_instruction, language_instruction):
+    """Return a ProviderStream with the summary of document."""
+    return provider.stream(summary_messages(provider, document, summary_instruction, language_instruction),
+                           **_options(provider))
+
+
+def is_long_document(document, max_tokens=SINGLE_PASS_MAX_TOKENS):
+    """Whether document is too long to summarize in a single request."""
+    return count_tokens(document) > max_tokens
+
+
+# Function to summarize the sections of a long document in parallel
+def summarize_sections(provider, document, section_tokens=SECTION_TOKENS, max_concurrency=MAP_CONCURRENCY):
+    """Split document into token-bounded sections and summarize each one.
+
+    Sections are streamed concurrently on the provider loop, at most
+    max_concurrency at a time. Returns the finished ProviderStreams in
+    document order; their text holds the section notes.
+    """
+    sections = [chunk["text"] for chunk in chunk_text(document, section_tokens, overlap_tokens=0)]
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def summarize(index, section):
+        instruction = SECTION_INSTRUCTION.format(index=index + 1, total=len(sections))
+        stream = provider.stream(summary_messages(provider, section, instruction, ""), **_options(provider))
+        async with semaphore:
+            async for _ in stream:
+                pass
+        return stream
+
+    async def summarize_all():
+        return await asyncio.gather(*(summarize(i, section) for i, section in enumerate(sections)))
+
+    return run_sync(summarize_all())
+
+
+# Function to combine section notes into the requested summary
+def reduce_summary(provider, section_notes, summary_instruction, language_instruction):
+    """Return a ProviderStream that merges the section notes into one summary."""
+    notes = "\n\n".join(f"Part {i}:\n{text}" for i, text in enumerate(section_notes, start=1))
+    document = f"Notes taken on each part of a long document, in order:\n\n{notes}"
+    return generate_summary(provider, document, summary_instruction, language_instruction)
+
+
+# Function to summarize a document to the end, picking single-pass or map-reduce
+def summarize_document(provider, document, summary_instruction, language_instruction):
+    """Summarize document without streaming, for batch use.
+
+    Returns (text, info), where info has the "mode", the number of
+    "sections", the "time_to_first_token" of the final request and the
+    "prompt_tokens" / "completion_tokens" summed over all requests.
+    """
+    sections = []
+    if is_long_document(document):
+        sections = summarize_sections(provider, document)
+        stream = reduce_summary(provider, [section.text for section in sections],
+                                summary_instruction, language_instruction)
+    else:
+        stream = generate_summary(provider, document, summary_instruction, language_instruction)
+    for _ in stream:
+        pass
+    info = {"mode": "map-reduce" if sections else "single", "sections": len(sections),
+            "time_to_first_token": stream.time_to_first_token}
+    for name in ("prompt_tokens", "completion_tokens"):
+        info[name] = sum((part.usage.get(name) or 0) for part in [*sections, stream])
+    return stream.text, info
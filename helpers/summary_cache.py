@@ -0,0 +1,88 @@
+import hashlib
+import os
+import time
+
+from helpers.sqlite_cache import SQLiteCache
+
+SUMMARY_CACHE_PATH = os.environ.get("SUMMARY_CACHE_PATH", os.path.join(".cache", "summaries.sqlite"))
+# Summaries older than SUMMARY_CACHE_MAX_AGE seconds are not served, and the
+# stored summaries are kept under SUMMARY_CACHE_MAX_BYTES (least recently used first out).
+SUMMARY_CACHE_MAX_AGE = int(os.environ.get("SUMMARY_CACHE_MAX_AGE", 30 * 24 * 3600))
+SUMMARY_CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+_FIELDS = ("summary", "latency", "time_to_first_token", "prompt_tokens", "completion_tokens", "mode", "created_at")
+
+
+def document_hash(document):
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+def summary_key(doc_hash, provider, model, summary_option, language_option):
+    return hashlib.sha256("\0".join((doc_hash, provider, model, summary_option, language_option)).encode("utf-8")).hexdigest()
+
+
+class SummaryCache(SQLiteCache):
+    """On-disk cache of finished summaries.
+
+    Entries are keyed by (document hash, provider, model, summary option,
+    language option) and keep the latency and token usage of the request
+    that produced them, so a hit can still report what it saved.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS summaries ("
+        " key TEXT PRIMARY KEY, summary TEXT NOT NULL, latency REAL, time_to_first_token REAL,"
+        " prompt_tokens INTEGER, completion_tokens INTEGER, mode TEXT, created_at REAL NOT NULL,"
+        " last_used REAL NOT NULL, size INTEGER NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)",
+    )
+
+    def __init__(self, path=SUMMARY_CACHE_PATH, max_age=SUMMARY_CACHE_MAX_AGE, max_bytes=SUMMARY_CACHE_MAX_BYTES):
+        super().__init__(path)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached entry for key as a dict, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM summaries WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.max_age),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return dict(zip(_FIELDS, row))
+
+    def put(self, key, summary, latency=None, time_to_first_token=None, usage=None, mode="single"):
+        """Store a finished summary with the latency (seconds) and usage of the request that made it."""
+        usage = usage or {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, summary, latency, time_to_first_token, usage.get("prompt_tokens"),
+                 usage.get("completion_tokens"), mode, now, now, len(summary.encode("utf-8"))),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM summaries WHERE created_at <= ?", (time.time() - self.max_age,))
+        self._evict_lru("summaries", "key", self.max_bytes)
+
+    def stats(self):
+        """Return hit/miss counters for this process plus the number of stored summaries."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+# Function to get the process-wide summary cache
+def get_summary_cache():
+    return SummaryCache.shared()
@@ -0,0 +1,133 @@
+import hashlib
+
+from helpers.ingest import ingest_documents
+
+# Bump when the way documents are built from their sources changes, so that
+# every stored fingerprint goes stale and the corpus is re-indexed once.
+INDEX_VERSION = "5"
+
+
+def index_version(variant=""):
+    """INDEX_VERSION, optionally qualified by a corpus-specific build setting."""
+    return f"{INDEX_VERSION}+{variant}" if variant else INDEX_VERSION
+
+
+# Function to fingerprint a source document
+def content_hash(content, variant=""):
+    """Hash the raw source content (bytes or str) together with the index version."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(index_version(variant).encode("utf-8") + b"\0" + content).hexdigest()
+
+
+def fingerprint_metadata(content, mtime, variant=""):
+    """Return the metadata fields that fingerprint a source document.
+
+    variant names anything besides the source that shapes the stored text
+    (e.g. a learned boilerplate template); changing it re-indexes the corpus.
+    """
+    return {
+        "content_hash": content_hash(content, variant),
+        "mtime": mtime,
+        "index_version": index_version(variant),
+    }
+
+
+# Function to read the stored fingerprints of a collection
+def get_fingerprints(collection, variant=""):
+    """Return {source id: {"content_hash", "mtime", "ids"}} for a collection.
+
+    Chunked documents are grouped under their "parent" metadata, so "ids"
+    lists every stored row that belongs to a source document. Rows written
+    under another index version or variant report no mtime, so they are
+    never taken as unchanged on the mtime fast path. A chunked document
+    whose rows disagree on the content hash, or number other than their
+    "n_chunks" (e.g. a sync that stopped between batches, or chunks
+    written before n_chunks was recorded), reports neither hash nor mtime,
+    so it is re-indexed.
+    """
+    stored = collection.get(include=["metadatas"])
+    known = {}
+    for doc_id, meta in zip(stored["ids"], stored["metadatas"]):
+        meta = meta or {}
+        entry = known.setdefault(
+            meta.get("parent", doc_id),
+            {
+                "content_hash": meta.get("content_hash"),
+                "mtime": meta.get("mtime") if meta.get("index_version") == index_version(variant) else None,
+                "ids": [],
+            },
+        )
+        entry["ids"].append(doc_id)
+        if "parent" in meta:
+            entry.setdefault("n_chunks", meta.get("n_chunks"))
+            if meta.get("content_hash") != entry["content_hash"]:
+                entry["n_chunks"] = None
+    for entry in known.values():
+        if "n_chunks" in entry and entry.pop("n_chunks") != len(entry["ids"]):
+            entry["content_hash"] = entry["mtime"] = None
+    return known
+
+
+# Function to bring a collection in line with its source corpus
+def sync_collection(collection, documents, client, known=None, split=None, **ingest_kwargs):
+    """Embed new or changed documents, delete removed ones and skip the rest.
+
+    documents is an iterable of {"id", "text", "metadata"} dicts whose
+    metadata carries a "content_hash" (and usually an "mtime"). A source
+    that already knows it is unchanged, e.g. because its mtime matches the
+    stored one, can yield {"id": ..., "unchanged": True} instead and skip
+    loading its text. Only the first document seen for an id is used; later
+    ones are counted as duplicates.
+
+    split, if given, turns the changed documents into the rows that are
+    actually stored (see helpers.chunking.chunk_documents); rows left over
+    from a previous version of a changed document are deleted.
+
+    Returns a dict with the number of documents added/updated, unchanged,
+    duplicate and removed, plus the ingest stats for the embedded rows.
+    """
+    if known is None:
+        known = get_fingerprints(collection)
+    seen = set()
+    changed = set()
+    written = set()
+    counts = {"unchanged": 0, "duplicates": 0}
+
+    def changed_documents():
+        for doc in documents:
+            if doc["id"] in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(doc["id"])
+            stored = known.get(doc["id"])
+            if doc.get("unchanged") or (stored and stored["content_hash"] == doc["metadata"]["content_hash"]):
+                counts["unchanged"] += 1
+                continue
+            changed.add(doc["id"])
+            yield doc
+
+    def rows():
+        docs = changed_documents()
+        for row in (split(docs) if split else docs):
+            written.add(row["id"])
+            yield row
+
+    ingest_stats = ingest_documents(collection, rows(), client, **ingest_kwargs)
+    removed = [doc_id for doc_id in known if doc_id not in seen]
+    stale = [
+        row_id
+        for doc_id, entry in known.items()
+        if doc_id not in seen or doc_id in changed
+        for row_id in entry["ids"]
+        if row_id not in written
+    ]
+    if stale:
+        collection.delete(ids=stale)
+    return {
+        "changed": len(changed),
+        "unchanged": counts["unchanged"],
+        "duplicates": counts["duplicates"],
+        "removed": len(removed),
+        "ingest": ingest_stats,
+    }
@@ -0,0 +1,58 @@
+import functools
+import hashlib
+
+import tiktoken
+
+
+# Function to load a tiktoken encoding once per process
+@functools.lru_cache(maxsize=None)
+def get_encoding(model='gpt-4o-mini'):
+    """Return the tiktoken encoding for a model, cached for the life of the process."""
+    return tiktoken.encoding_for_model(model)
+
+
+def count_tokens(text, model='gpt-4o-mini'):
+    """Count the tokens in a single string."""
+    return len(get_encoding(model).encode(text))
+
+
+# Function to count a message's tokens, reusing earlier counts
+def message_tokens(message, cache=None, model='gpt-4o-mini'):
+    """Count the tokens of a message's content.
+
+    cache is a dict (e.g. one kept in st.session_state) mapping a hash of
+    the model and content to its token count, so each distinct message is
+    encoded only once.
+    """
+    if cache is None:
+        return count_tokens(message['content'], model)
+    key = hashlib.sha1(f"{model}\0{message['content']}".encode("utf-8")).hexdigest()
+    if key not in cache:
+        cache[key] = count_tokens(message['content'], model)
+    return cache[key]
+
+
+# Function to calculate tokens
+def calculate_tokens(messages, cache=None, model='gpt-4o-mini'):
+    """Calculate total tokens for a list of messages."""
+    return sum(message_tokens(msg, cache, model) for msg in messages)
+
+
+def truncate_messages_by_tokens(messages, max_tokens, cache=None, model='gpt-4o-mini'):
+    """Keep the newest messages that fit in max_tokens, in a single pass.
+
+    A leading system message (the context documents) is always kept and
+    counts against the budget; the remaining messages are walked from the
+    newest backwards until the next one would not fit. The most recent
+    message is kept even if it alone exceeds the budget.
+    """
+    pinned = messages[:1] if messages and messages[0]['role'] == 'system' else []
+    history = messages[len(pinned):]
+    budget = max_tokens - calculate_tokens(pinned, cache, model)
+    kept = 0
+    for msg in reversed(history):
+        budget -= message_tokens(msg, cache, model)
+        if budget < 0 and kept:
+            break
+        kept += 1
+    return pinned + history[len(history) - kept:]
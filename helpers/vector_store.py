@@ -0,0 +1,306 @@
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Which vector store backs the pages: "numpy" (exact search over a
+# memory-mapped matrix, see NumpyCollection) or "chroma".
+VECTOR_STORE = os.environ.get("VECTOR_STORE", "numpy")
+
+_INCLUDE = ("documents", "metadatas")
+_QUERY_INCLUDE = ("documents", "metadatas", "distances")
+_OPERATORS = {
+    "$eq": lambda value, arg: value == arg,
+    "$ne": lambda value, arg: value != arg,
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+    "$in": lambda value, arg: value in arg,
+    "$nin": lambda value, arg: value not in arg,
+}
+
+# Vectorized forms of the operators, for filtering whole metadata columns
+_COMPARISONS = {
+    "$eq": lambda column, arg: column == arg,
+    "$ne": lambda column, arg: column != arg,
+    "$gt": lambda column, arg: column > arg,
+    "$gte": lambda column, arg: column >= arg,
+    "$lt": lambda column, arg: column < arg,
+    "$lte": lambda column, arg: column <= arg,
+}
+
+
+def matches(metadata, where):
+    """Evaluate a Chroma-style where filter against one metadata dict."""
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(_OPERATORS[op](metadata.get(key), arg) for op, arg in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class NumpyCollection:
+    """A vector collection with the parts of the Chroma collection API we use.
+
+    Embeddings are stored L2-normalized as raw float32 rows in <path>.f32,
+    opened memory-mapped, and ids, documents and metadatas as a JSON-lines
+    log in <path>.jsonl. upsert() appends new rows to both files and
+    overwrites the vectors of existing ids in place, so ingesting in
+    batches costs time linear in the rows written; delete() rewrites both
+    files without the deleted rows. Queries are exact: one matrix multiply
+    over the rows that pass the where filter, then argpartition for the top
+    k. Filters are evaluated on cached per-field metadata columns rather
+    than row by row. Distances are cosine distances, as in a Chroma
+    collection with "hnsw:space" "cosine".
+
+    Ids, documents and metadatas are held in memory (the vectors are not),
+    which suits corpora up to a few hundred thousand rows; use the chroma
+    backend beyond that. Stores in the earlier <path>.npy + <path>.json
+    layout are converted on open.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = metadata or {}
+        self._lock = threading.Lock()
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._positions = {}
+        self._dimensions = None
+        self._embeddings = None
+        self._columns = {}
+        if os.path.exists(f"{path}.jsonl"):
+            self._load()
+        elif os.path.exists(f"{path}.json"):
+            self._convert_legacy()
+
+    def count(self):
+        return len(self._ids)
+
+    def _load(self):
+        # Replay the log; a last line cut short by a crash is dropped, with any vector written for it
+        good = 0
+        with open(f"{self.path}.jsonl", "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                if "dimensions" in record:
+                    self._dimensions = record["dimensions"]
+                else:
+                    self._set_row(record["row"], record["id"], record["document"], record["metadata"])
+        if good < os.path.getsize(f"{self.path}.jsonl"):
+            os.truncate(f"{self.path}.jsonl", good)
+        if self._dimensions and os.path.getsize(f"{self.path}.f32") > self._row_bytes() * len(self._ids):
+            os.truncate(f"{self.path}.f32", self._row_bytes() * len(self._ids))
+        self._map()
+
+    def _convert_legacy(self):
+        with open(f"{self.path}.json", encoding="utf-8") as file:
+            rows = json.load(file)
+        for row, (doc_id, document, metadata) in enumerate(zip(rows["ids"], rows["documents"], rows["metadatas"])):
+            self._set_row(row, doc_id, document, metadata)
+        matrix = np.load(f"{self.path}.npy") if self._ids else np.empty((0, 0), np.float32)
+        self._dimensions = matrix.shape[1] if self._ids else None
+        self._rewrite(matrix)
+        os.remove(f"{self.path}.json")
+        os.remove(f"{self.path}.npy")
+
+    def _set_row(self, row, doc_id, document, metadata):
+        if row == len(self._ids):
+            self._ids.append(doc_id)
+            self._documents.append(document)
+            self._metadatas.append(metadata)
+            self._positions[doc_id] = row
+        else:
+            self._documents[row] = document
+            self._metadatas[row] = metadata
+
+    def _row_bytes(self):
+        return self._dimensions * np.dtype(np.float32).itemsize
+
+    def _map(self):
+        self._columns = {}
+        self._embeddings = (np.memmap(f"{self.path}.f32", dtype=np.float32, mode="r",
+                                      shape=(len(self._ids), self._dimensions)) if self._ids else None)
+
+    def _records(self, rows):
+        return "".join(json.dumps({"id": self._ids[row], "row": row, "document": self._documents[row],
+                                   "metadata": self._metadatas[row]}) + "\n" for row in rows)
+
+    def _rewrite(self, matrix):
+        """Write both files from scratch for the rows in memory; matrix holds their vectors in order."""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write to temporary files and swap them in, so readers never see half a file
+        with open(f"{self.path}.tmp.f32", "wb") as file:
+            file.write(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+        with open(f"{self.path}.tmp.jsonl", "w", encoding="utf-8") as file:
+            file.write(json.dumps({"dimensions": self._dimensions}) + "\n")
+            file.write(self._records(range(len(self._ids))))
+        os.replace(f"{self.path}.tmp.f32", f"{self.path}.f32")
+        os.replace(f"{self.path}.tmp.jsonl", f"{self.path}.jsonl")
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._map()
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        vectors = _normalize(embeddings)
+        with self._lock:
+            if not os.path.exists(f"{self.path}.jsonl"):
+                self._dimensions = vectors.shape[1]
+                self._rewrite(np.empty((0, self._dimensions), np.float32))
+            rows = []
+            # Vectors go first: a log line never points at a vector that was not written
+            with open(f"{self.path}.f32", "r+b") as file:
+                for i, doc_id in enumerate(ids):
+                    row = self._positions.get(doc_id, len(self._ids))
+                    self._set_row(row, doc_id, documents[i] if documents is not None else None,
+                                  metadatas[i] if metadatas is not None else None)
+                    file.seek(row * self._row_bytes())
+                    file.write(vectors[i].tobytes())
+                    rows.append(row)
+            with open(f"{self.path}.jsonl", "a", encoding="utf-8") as file:
+                file.write(self._records(rows))
+            self._map()
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            remove = set(ids or [])
+            if where:
+                remove.update(doc_id for doc_id, meta in zip(self._ids, self._metadatas) if matches(meta, where))
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in remove]
+            if len(keep) == len(self._ids):
+                return
+            matrix = np.array(self._embeddings[keep]) if keep else np.empty((0, self._dimensions), np.float32)
+            self._ids = [self._ids[i] for i in keep]
+            self._documents = [self._documents[i] for i in keep]
+            self._metadatas = [self._metadatas[i] for i in keep]
+            self._rewrite(matrix)
+
+    def _column(self, key):
+        """One metadata field for all rows as an array: float for numbers (NaN if missing), object otherwise."""
+        if key not in self._columns:
+            values = [(meta or {}).get(key) for meta in self._metadatas]
+            numeric = all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+                          for value in values)
+            if numeric:
+                self._columns[key] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            else:
+                self._columns[key] = np.array(values, dtype=object)
+        return self._columns[key]
+
+    def _mask(self, where):
+        """Evaluate a where filter over all rows at once, using cached metadata columns."""
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._mask(clause)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self._mask(clause) for clause in condition])
+            else:
+                column = self._column(key)
+                for op, arg in (condition.items() if isinstance(condition, dict) else [("$eq", condition)]):
+                    if op in ("$in", "$nin"):
+                        found = np.isin(column, list(arg))
+                        mask &= found if op == "$in" else ~found
+                    elif column.dtype == object and op not in ("$eq", "$ne"):
+                        mask &= np.array([_OPERATORS[op](value, arg) for value in column], dtype=bool)
+                    else:
+                        mask &= np.asarray(_COMPARISONS[op](column, arg), dtype=bool)
+        return mask
+
+    def _rows(self, ids=None, where=None):
+        if ids is not None:
+            rows = [self._positions[doc_id] for doc_id in ids if doc_id in self._positions]
+            if where:
+                rows = [i for i in rows if matches(self._metadatas[i], where)]
+            return rows
+        if where:
+            return np.flatnonzero(self._mask(where)).tolist()
+        return list(range(len(self._ids)))
+
+    def _result(self, rows, include):
+        result = {"ids": [self._ids[i] for i in rows]}
+        result["documents"] = [self._documents[i] for i in rows] if "documents" in include else None
+        result["metadatas"] = [self._metadatas[i] for i in rows] if "metadatas" in include else None
+        if "embeddings" in include:
+            result["embeddings"] = [self._embeddings[i].tolist() for i in rows]
+        return result
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=_INCLUDE):
+        rows = self._rows(ids, where)
+        rows = rows[offset or 0:][:limit] if limit is not None else rows[offset or 0:]
+        return self._result(rows, include)
+
+    def query(self, query_embeddings, n_results=10, where=None, include=_QUERY_INCLUDE):
+        """Return the n_results closest rows for each query, in Chroma's list-of-lists layout."""
+        rows = np.asarray(self._rows(where=where), dtype=np.int64)
+        results = {key: [] for key in ("ids", "documents", "metadatas", "distances")}
+        queries = _normalize(query_embeddings)
+        k = min(n_results, len(rows))
+        if k == 0:
+            for _ in queries:
+                for key in results:
+                    results[key].append([])
+            return results
+        candidates = self._embeddings if len(rows) == len(self._ids) else self._embeddings[rows]
+        scores = queries @ candidates.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for query_scores, query_top in zip(scores, top):
+            order = query_top[np.argsort(-query_scores[query_top])]
+            found = self._result(rows[order].tolist(), include)
+            results["ids"].append(found["ids"])
+            results["documents"].append(found["documents"])
+            results["metadatas"].append(found["metadatas"])
+            results["distances"].append((1.0 - query_scores[order]).tolist())
+        return results
+
+
+def _chroma_collection(path, name, metadata):
+    # Chroma needs a newer SQLite than some hosts ship; use pysqlite3 when available
+    try:
+        __import__('pysqlite3')
+        sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+    except ImportError:
+        pass
+    import chromadb
+    client = chromadb.PersistentClient(path=path)
+    return client.get_or_create_collection(name=name, metadata=metadata)
+
+
+# Function to open a collection with the configured backend
+def open_collection(path, name, metadata=None, backend=None):
+    """Open (or create) the named collection stored under path.
+
+    backend is "numpy" or "chroma" and defaults to VECTOR_STORE. Both
+    return an object with upsert/delete/get/query/count as used by the
+    helpers and pages.
+    """
+    backend = backend or VECTOR_STORE
+    if backend == "chroma":
+        return _chroma_collection(path, name, metadata)
+    if backend != "numpy":
+        raise ValueError(f"Unknown vector store backend: {backend}")
+    return NumpyCollection(os.path.join(path, name), metadata)
@@ -1,35 +1,13 @@
 import streamlit as st
 import openai
-import os
-import chromadb
-from bs4 import BeautifulSoup
-from openai import OpenAI
 import json
-import time
-
-# Function to verify OpenAI API key
-def verify_openai_key(api_key):
-    try:
-        client = OpenAI(api_key=api_key)
-        client.models.list()
-        return client, True, "API key is valid"
-    except Exception as e:
-        return None, False, str(e)
-
-# Vector DB functions
-def add_to_collection(collection, text, filename):
-    openai_client = OpenAI(api_key=st.secrets['key1'])
-    response = openai_client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
-    )
-    embedding = response.data[0].embedding
-    collection.add(
-        documents=[text],
-        ids=[filename],
-        embeddings=[embedding]
-    )
-    return collection
+from helpers.embedding_cache import get_embedding_cache
+from helpers.vector_store import open_collection
+from helpers.chunking import query_chunks
+from helpers.embeddings import embed_text
+from helpers.su_orgs import sync_su_orgs_collection
+from helpers.clients import get_openai_client, verify_openai_key
+from helpers.providers import get_provider, write_stream
 
 # OpenAI function calling setup
 tools = [
@@ -57,7 +35,7 @@ def chat_completion_request(message, tools, tool_choice=None):
     try:
         # messages = []
         # messages.append(message)
-        client = OpenAI(api_key=openai_api_key)
+        client = get_openai_client(openai_api_key)
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=message,
@@ -69,50 +47,45 @@ def chat_completion_request(message, tools, tool_choice=None):
         st.error(f"Unable to generate ChatCompletion response. Error: {e}")
         return e
 
+# Open the vector DB once per process and sync it with the su_orgs pages
+@st.cache_resource(show_spinner="Syncing vector DB with the su_orgs pages...")
+def load_vectordb(db_path="HW4_VectorDB"):
+    # numpy or Chroma, depending on the VECTOR_STORE setting
+    collection = open_collection(
+        db_path,
+        "HW4Collection",
+        metadata={"hnsw:space": "cosine", "hnsw:M": 32}
+    )
+    # Only new or changed pages are embedded; removed pages are deleted
+    openai_client = get_openai_client(st.secrets['key1'])
+    stats = sync_su_orgs_collection(collection, openai_client)
+    return collection, stats
+
 def setup_vectordb():
-    db_path = "HW4_VectorDB"
-    
-    if not os.path.exists(db_path):
-        st.info("Setting up vector DB for the first time...")
-        client = chromadb.PersistentClient(path=db_path)
-        collection = client.get_or_create_collection(
-            name="HW4Collection",
-            metadata={"hnsw:space": "cosine", "hnsw:M": 32}
+    collection, stats = load_vectordb()
+    st.session_state.HW4_vectorDB = collection
+    if stats["changed"] or stats["removed"]:
+        # Only pages without embedded JSON have template text to strip
+        stripped = (f", {stats['boilerplate_tokens']} template tokens stripped, {stats['tokens']} kept"
+                    if stats['boilerplate_tokens'] else "")
+        st.success(
+            f"VectorDB synced: {stats['changed']} HTML files added or updated, "
+            f"{stats['removed']} removed, {stats['unchanged']} unchanged "
+            f"({stats['ingest']['docs_per_sec']:.1f} docs/sec{stripped})"
         )
-        
-        su_orgs_path = os.path.join(os.getcwd(), "HWs/su_orgs/")
-        html_files = [f for f in os.listdir(su_orgs_path) if f.endswith('.html')]
-        
-        for html_file in html_files:
-            file_path = os.path.join(su_orgs_path, html_file)
-            with open(file_path, 'r', encoding='utf-8') as file:
-                soup = BeautifulSoup(file, 'html.parser')
-                text = soup.get_text(separator=' ', strip=True)
-                collection = add_to_collection(collection, text, html_file)
-        
-        st.success(f"VectorDB setup complete with {len(html_files)} HTML files!")
     else:
-        st.info("VectorDB already exists. Loading from disk...")
-        client = chromadb.PersistentClient(path=db_path)
-        st.session_state.HW4_vectorDB = client.get_collection(name="HW4Collection")
+        st.info(f"VectorDB is up to date with {stats['unchanged']} HTML files.")
 
-def search_vectordb(query, k=3):
+def search_vectordb(query, k=3, collapse=True):
     if 'HW4_vectorDB' in st.session_state:
         collection = st.session_state.HW4_vectorDB
-        openai_client = OpenAI(api_key=st.secrets['key1'])
-        response = openai_client.embeddings.create(
-            input=query,
-            model="text-embedding-3-small"
-        )
-        query_embedding = response.data[0].embedding
+        openai_client = get_openai_client(st.secrets['key1'])
+        query_embedding = embed_text(openai_client, query)
         
         # Show spinner while retrieving results
         with st.spinner('Retrieving information from the database...'):
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                include=['documents', 'distances', 'metadatas'],
-                n_results=k
-            )
+            # Retrieve the best chunks, merged per organization page
+            results = query_chunks(collection, query_embedding, k=k, collapse=collapse)
         return results
     else:
         st.error("VectorDB not set up. Please set up the VectorDB first.")
@@ -134,6 +107,13 @@ else:
 # Set up VectorDB
 setup_vectordb()
 
+# Embedding cache statistics
+cache_stats = get_embedding_cache().stats()
+st.sidebar.caption(
+    f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+    f"{cache_stats['entries']} vectors stored"
+)
+
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state['messages'] = []
@@ -166,7 +146,6 @@ if prompt := st.chat_input("What would you like to know about iSchool student or
             
             # Call search_vectordb only if there is a tool call
             with st.spinner('Retrieving relevant information from the database...'):
-                time.sleep(1) 
                 document = search_vectordb(query)['documents'][0]
             
             msgs = []
@@ -174,37 +153,15 @@ if prompt := st.chat_input("What would you like to know about iSchool student or
             msgs.append(msg)
             
             # Stream the final response from OpenAI
-            openai_client = OpenAI(api_key=st.secrets['key1'])
             message_placeholder = st.empty()
-            full_response = ""
-            stream = openai_client.chat.completions.create(
-                        model='gpt-4o',
-                        messages=msgs,
-                        stream=True
-                    )
-            if stream:
-                for chunk in stream:
-                    if chunk.choices[0].delta.content is not None:
-                        full_response += chunk.choices[0].delta.content
-                        message_placeholder.markdown(full_response + "▌")
-                message_placeholder.markdown(full_response)
+            stream = get_provider("OpenAI", openai_api_key, 'gpt-4o').stream(msgs)
+            full_response = write_stream(stream, message_placeholder)
         
         else:
             # If no tool is used, just call the LLM directly
-            openai_client = OpenAI(api_key=st.secrets['key1'])
             message_placeholder = st.empty()
-            full_response = ""
-            stream = openai_client.chat.completions.create(
-                        model='gpt-4o',
-                        messages=[msg],
-                        stream=True
-                    )
-            if stream:
-                for chunk in stream:
-                    if chunk.choices[0].delta.content is not None:
-                        full_response += chunk.choices[0].delta.content
-                        message_placeholder.markdown(full_response + "▌")
-                message_placeholder.markdown(full_response)
+            stream = get_provider("OpenAI", openai_api_key, 'gpt-4o').stream([msg])
+            full_response = write_stream(stream, message_placeholder)
         
     # Add assistant response to chat history
     st.session_state.messages.append({"role": "assistant", "content": full_response})
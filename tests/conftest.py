@@ -0,0 +1,52 @@
+import hashlib
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import embedding_cache  # noqa: E402
+
+EMBEDDING_DIMENSIONS = 16
+
+
+def fake_vector(text):
+    """Bag-of-words vector: texts that share words point in similar directions."""
+    vector = [0.0] * EMBEDDING_DIMENSIONS
+    for word in text.lower().split():
+        vector[int(hashlib.sha1(word.encode("utf-8")).hexdigest(), 16) % EMBEDDING_DIMENSIONS] += 1.0
+    return vector
+
+
+class FakeEmbeddings:
+    """Stands in for client.embeddings; fails every call after fail_after calls when set."""
+
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+
+    def create(self, input, model, **kwargs):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise RuntimeError("embedding request failed")
+        self.calls.append(list(input))
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=fake_vector(text))
+                                     for i, text in enumerate(input)])
+
+
+class FakeClient:
+    def __init__(self, fail_after=None):
+        self.embeddings = FakeEmbeddings(fail_after)
+
+
+@pytest.fixture(autouse=True)
+def isolated_embedding_cache(tmp_path, monkeypatch):
+    """Give every test its own on-disk embedding cache."""
+    cache = embedding_cache.EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+    monkeypatch.setattr(embedding_cache.EmbeddingCache, "_instance", cache)
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
@@ -0,0 +1,116 @@
+from helpers.chunking import chunk_text
+from helpers.embeddings import EMBEDDING_MODEL
+from helpers.tokens import get_encoding
+
+LINES = [f"Line {i}: " + " ".join(f"word{i}x{j}" for j in range(6)) for i in range(40)]
+TEXT = "\n".join(LINES)
+
+
+def n_tokens(text):
+    return len(get_encoding(EMBEDDING_MODEL).encode(text))
+
+
+# Sizes in lines, whatever the tokenizer makes of them
+LINE_TOKENS = max(n_tokens(line) for line in LINES)
+MAX_TOKENS = 4 * LINE_TOKENS
+
+
+def test_chunks_stay_within_the_token_limit_and_cover_the_text():
+    chunks = list(chunk_text(TEXT, max_tokens=MAX_TOKENS, overlap_tokens=0))
+    assert len(chunks) > 1
+    assert all(chunk["tokens"] <= MAX_TOKENS for chunk in chunks)
+    assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+    assert all(chunk["text"] == TEXT[chunk["char_start"]:chunk["char_end"]] for chunk in chunks)
+    # Without overlap, consecutive chunks meet at a line break
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert TEXT[previous["char_end"]:chunk["char_start"]] == "\n"
+    assert chunks[0]["char_start"] == 0 and chunks[-1]["char_end"] == len(TEXT)
+
+
+def test_chunks_overlap_by_whole_lines_up_to_the_overlap_budget():
+    chunks = list(chunk_text(TEXT, max_tokens=MAX_TOKENS, overlap_tokens=LINE_TOKENS))
+    for previous, chunk in zip(chunks, chunks[1:]):
+        overlap = TEXT[chunk["char_start"]:previous["char_end"]]
+        assert overlap in LINES
+        assert previous["text"].endswith(overlap)
+
+
+def test_a_line_longer_than_the_limit_is_cut_at_token_boundaries():
+    line = " ".join(f"token{i}" for i in range(300))
+    chunks = list(chunk_text(line, max_tokens=50, overlap_tokens=0))
+    assert len(chunks) > 1
+    assert all(chunk["tokens"] <= 50 for chunk in chunks)
+    assert "".join(chunk["text"] for chunk in chunks) == line
+
+
+def indexed_pages(tmp_path, client):
+    from helpers.chunking import chunk_documents
+    from helpers.ingest import ingest_documents
+    from helpers.vector_store import NumpyCollection
+
+    collection = NumpyCollection(str(tmp_path / "chunks"))
+    pages = [
+        {"id": "rowing", "text": "\n".join(["rowing club boats river"] * 3 + ["rowing practice early morning"] * 3)},
+        {"id": "chess", "text": "\n".join(["chess club openings endgames"] * 6)},
+    ]
+    # Two lines per chunk: three chunks per page
+    two_lines = 2 * max(n_tokens(line) for page in pages for line in page["text"].splitlines())
+    ingest_documents(collection, chunk_documents(pages, max_tokens=two_lines, overlap_tokens=0), client)
+    return collection
+
+
+def test_query_chunks_returns_chunks_or_collapses_them_per_parent(tmp_path, client):
+    from conftest import fake_vector
+    from helpers.chunking import query_chunks
+
+    collection = indexed_pages(tmp_path, client)
+    query = fake_vector("rowing club boats river")
+
+    chunks = query_chunks(collection, query, k=2, collapse=False)
+    assert len(chunks["ids"][0]) == 2
+    assert all(doc_id.startswith("rowing#") for doc_id in chunks["ids"][0])
+
+    parents = query_chunks(collection, query, k=2, collapse=True)
+    assert parents["ids"] == [["rowing", "chess"]]
+    assert parents["metadatas"][0][0]["n_chunks"] == 2
+    assert parents["distances"][0][0] <= parents["distances"][0][1]
+
+    only_chess = query_chunks(collection, query, k=2, collapse=False, where={"parent": "chess"})
+    assert {meta["parent"] for meta in only_chess["metadatas"][0]} == {"chess"}
+
+
+def test_retrieve_chunks_returns_the_files_chunks_in_reading_order(tmp_path, client):
+    from helpers.doc_index import ensure_indexed, retrieve_chunks
+    from helpers.vector_store import NumpyCollection
+
+    collection = NumpyCollection(str(tmp_path / "docqa"))
+    # Long enough for several chunks at the default chunk size
+    text = "\n".join(f"Section {i}: " + " ".join(["grant deadline" if i in (1, 6) else "campus parking"] * 40)
+                     for i in range(8))
+    assert ensure_indexed(collection, client, "file1", "report.pdf", text)
+    assert not ensure_indexed(collection, client, "file1", "report.pdf", text)
+    assert ensure_indexed(collection, client, "file2", "other.pdf", "grant deadline extended")
+
+    chunks = retrieve_chunks(collection, client, "grant deadline", ["file1"], k=2)
+    assert [name for name, _ in chunks] == ["report.pdf", "report.pdf"]
+    assert chunks[0][1] != chunks[1][1]
+    assert all(chunk in text for _, chunk in chunks)
+    positions = [text.index(chunk) for _, chunk in chunks]
+    assert positions == sorted(positions)
+
+
+def test_partly_indexed_upload_is_indexed_again(tmp_path, client):
+    from helpers.doc_index import ensure_indexed
+    from helpers.vector_store import NumpyCollection
+
+    collection = NumpyCollection(str(tmp_path / "docqa"))
+    text = "\n".join(f"Section {i}: " + " ".join(["budget review"] * 40) for i in range(8))
+    ensure_indexed(collection, client, "file1", "report.pdf", text)
+    ids = collection.get()["ids"]
+    assert len(ids) > 1
+
+    # An embedding request failed after the first batch was written
+    collection.delete(ids=ids[1:])
+    assert ensure_indexed(collection, client, "file1", "report.pdf", text)
+    assert collection.get()["ids"] == ids
+    assert not ensure_indexed(collection, client, "file1", "report.pdf", text)
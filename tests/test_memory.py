@@ -0,0 +1,65 @@
+from helpers.memory import RollingSummary
+from helpers.providers import FakeProvider
+
+
+class RecordingProvider(FakeProvider):
+    """FakeProvider that keeps the prompts it was asked to complete."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompts = []
+
+    async def _events(self, messages, **options):
+        self.prompts.append(messages[-1]["content"])
+        async for event in super()._events(messages, **options):
+            yield event
+
+
+def chat(n):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(n)]
+
+
+def wait(memory):
+    memory._future.result(timeout=5)
+
+
+def test_context_does_not_wait_for_a_running_fold():
+    memory = RollingSummary()
+    messages = chat(2)
+    memory.update(RecordingProvider(pieces=("summary one",), first_token_delay=0.2), messages)
+    assert memory.context(messages) == ("", messages)
+    wait(memory)
+    assert memory.context(messages) == ("summary one", [])
+
+
+def test_each_fold_sends_only_new_messages_with_the_previous_summary():
+    memory = RollingSummary()
+    provider = RecordingProvider(pieces=("summary one",))
+    messages = chat(2)
+    memory.update(provider, messages)
+    wait(memory)
+
+    messages = chat(4)
+    provider.pieces = ["summary two"]
+    memory.update(provider, messages)
+    wait(memory)
+    assert memory.context(messages) == ("summary two", [])
+    assert "summary one" in provider.prompts[1]
+    assert "message 1" not in provider.prompts[1]
+    assert "message 3" in provider.prompts[1]
+
+
+def test_failed_fold_keeps_the_previous_summary():
+    class FailingProvider(FakeProvider):
+        async def _events(self, messages, **options):
+            raise RuntimeError("provider down")
+            yield
+
+    memory = RollingSummary()
+    messages = chat(2)
+    memory.update(FailingProvider(), messages)
+    try:
+        wait(memory)
+    except RuntimeError:
+        pass
+    assert memory.context(messages) == ("", messages)
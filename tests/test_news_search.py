@@ -0,0 +1,41 @@
+from helpers.bm25 import BM25Index
+from helpers.news import hybrid_search, news_filter
+from helpers.vector_store import NumpyCollection
+
+from conftest import fake_vector
+
+
+def make_news(tmp_path, rows):
+    collection = NumpyCollection(str(tmp_path / "news"))
+    collection.upsert(
+        ids=[url for url, _, _, _ in rows],
+        embeddings=[fake_vector(text) for _, text, _, _ in rows],
+        documents=[text for _, text, _, _ in rows],
+        metadatas=[{"company": company, "days_since_2000": day} for _, _, company, day in rows],
+    )
+    bm25 = BM25Index.build((url, f"{company} {text}", company) for url, text, company, _ in rows)
+    return collection, bm25
+
+
+def test_filter_applies_before_keyword_candidates_are_cut(tmp_path, client):
+    # Ten strong "description" matches from one company crowd out the filtered one
+    rows = [(f"a{i}", "description description description", "Acme", 9000 + i) for i in range(10)]
+    rows.append(("b0", "a long article with one description in it and many other words", "Beta", 9000))
+    collection, bm25 = make_news(tmp_path, rows)
+
+    results, mode = hybrid_search(collection, client, bm25, "description", k=3, candidates=5,
+                                  where=news_filter(company="Beta"))
+    assert mode == "keyword"
+    assert results["ids"] == [["b0"]]
+
+
+def test_recency_and_date_range(tmp_path, client):
+    rows = [("old", "merger talks", "Acme", 9000), ("new", "merger talks", "Acme", 9100),
+            ("newest", "merger talks", "Acme", 9200)]
+    collection, bm25 = make_news(tmp_path, rows)
+
+    results, _ = hybrid_search(collection, client, bm25, "merger", k=3)
+    assert results["ids"][0][0] == "newest"
+
+    results, _ = hybrid_search(collection, client, bm25, "merger", k=3, where=news_filter(end_day=9150))
+    assert results["ids"] == [["new", "old"]]
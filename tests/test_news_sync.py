@@ -0,0 +1,74 @@
+import csv
+
+import pytest
+
+from helpers.news import sync_news_collection
+from helpers.vector_store import NumpyCollection
+
+from conftest import FakeClient
+
+N_ROWS = 12
+
+
+@pytest.fixture
+def news_csv(tmp_path):
+    path = tmp_path / "news.csv"
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["company_name", "days_since_2000", "Date", "Document", "URL"])
+        for i in range(N_ROWS):
+            writer.writerow([f"Company {i % 3}", 9000 + i, f"2024-08-{i + 1:02d}", f"news item number {i}",
+                             f"https://example.com/{i}"])
+        # Duplicate URLs: only the first row of each is stored
+        writer.writerow(["Company 0", 9000, "2024-08-01", "a later copy", "https://example.com/0"])
+        writer.writerow(["Company 1", 9001, "2024-08-02", "another copy", "https://example.com/1"])
+    return str(path)
+
+
+def sync(collection, client, news_csv, checkpoint):
+    return sync_news_collection(collection, client, csv_path=news_csv, checkpoint_path=checkpoint,
+                                max_batch_size=2, max_workers=1)
+
+
+def test_sync_dedupes_urls_and_skips_unchanged_csv(tmp_path, news_csv, client):
+    collection = NumpyCollection(str(tmp_path / "db" / "news"))
+    checkpoint = str(tmp_path / "db" / "news_sync.json")
+
+    stats = sync(collection, client, news_csv, checkpoint)
+    assert (stats["changed"], stats["duplicates"]) == (N_ROWS, 2)
+    assert collection.count() == N_ROWS
+    assert collection.get(ids=["https://example.com/0"])["documents"] == ["news item number 0"]
+
+    calls = len(client.embeddings.calls)
+    stats = sync(collection, client, news_csv, checkpoint)
+    assert (stats["changed"], stats["unchanged"]) == (0, N_ROWS)
+    assert len(client.embeddings.calls) == calls
+
+
+def test_interrupted_sync_resumes_after_written_rows(tmp_path, news_csv):
+    path = str(tmp_path / "db" / "news")
+    checkpoint = str(tmp_path / "db" / "news_sync.json")
+
+    failing = FakeClient(fail_after=3)
+    with pytest.raises(RuntimeError):
+        sync(NumpyCollection(path), failing, news_csv, checkpoint)
+    assert NumpyCollection(path).count() == 6
+
+    client = FakeClient()
+    collection = NumpyCollection(path)
+    stats = sync(collection, client, news_csv, checkpoint)
+    assert (stats["changed"], stats["unchanged"], stats["duplicates"]) == (N_ROWS - 6, 6, 2)
+    assert collection.count() == N_ROWS
+    embedded = [text for call in client.embeddings.calls for text in call]
+    assert embedded == [f"news item number {i}" for i in range(6, N_ROWS)]
+
+
+def test_wiped_collection_is_rebuilt_despite_finished_checkpoint(tmp_path, news_csv, client):
+    checkpoint = str(tmp_path / "news_sync.json")
+    sync(NumpyCollection(str(tmp_path / "db1" / "news")), client, news_csv, checkpoint)
+
+    # Same checkpoint, but an empty store (DB directory deleted, or another backend)
+    collection = NumpyCollection(str(tmp_path / "db2" / "news"))
+    stats = sync(collection, client, news_csv, checkpoint)
+    assert (stats["changed"], stats["unchanged"]) == (N_ROWS, 0)
+    assert collection.count() == N_ROWS
@@ -0,0 +1,27 @@
+from helpers.providers import FakeProvider, run_sync
+
+
+def test_stream_records_text_usage_and_timings():
+    provider = FakeProvider(pieces=("Hel", "lo", "!"), first_token_delay=0.05, delay=0.01,
+                            usage={"prompt_tokens": 7, "completion_tokens": 3})
+    stream = provider.stream([{"role": "user", "content": "hi"}])
+    assert [chunk.text for chunk in stream] == ["Hel", "lo", "!"]
+    assert stream.text == "Hello!"
+    assert stream.usage == {"prompt_tokens": 7, "completion_tokens": 3}
+    assert stream.time_to_first_token >= 0.05
+    assert stream.total_latency >= stream.time_to_first_token + 0.02
+
+
+def test_stream_can_be_consumed_on_the_provider_loop():
+    async def collect(stream):
+        return [chunk.text async for chunk in stream]
+
+    stream = FakeProvider(pieces=("a", "b")).stream([])
+    assert run_sync(collect(stream)) == ["a", "b"]
+    assert stream.time_to_first_token is not None
+
+
+def test_timings_are_unset_before_the_stream_runs():
+    stream = FakeProvider().stream([])
+    assert stream.time_to_first_token is None
+    assert stream.total_latency is None
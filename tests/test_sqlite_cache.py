@@ -0,0 +1,25 @@
+from helpers.embedding_cache import EmbeddingCache, get_embedding_cache
+from helpers.fetch import FetchCache
+from helpers.summary_cache import SummaryCache
+
+
+def test_summary_cache_evicts_least_recently_used_first(tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite"), max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.put(key, key * 100)
+    assert cache.get("a") is None
+    assert cache.get("c")["summary"] == "c" * 100
+
+
+def test_fetch_cache_drops_responses_of_evicted_texts(tmp_path):
+    cache = FetchCache(str(tmp_path / "http.sqlite"), max_bytes=150)
+    cache.put_response("https://example.com/old", None, None, "old")
+    cache.put_text("old", "x" * 100)
+    cache.put_text("new", "y" * 100)
+    assert cache.get_text("old") is None
+    assert cache.get_response("https://example.com/old") is None
+    assert cache.get_text("new") == "y" * 100
+
+
+def test_shared_cache_is_one_instance_per_class():
+    assert get_embedding_cache() is EmbeddingCache.shared()
@@ -0,0 +1,32 @@
+import json
+
+from helpers.su_orgs import get_su_orgs_boilerplate, iter_su_orgs_documents
+
+NAVIGATION = "<div>CampusLabs Navigation</div><div>Sign In</div>"
+
+
+def write_pages(path):
+    for i, activity in enumerate(["Rowing", "Debate", "Theater", "Robotics"]):
+        (path / f"org{i}.html").write_text(
+            f"<html><body>{NAVIGATION}<p>{activity}</p></body></html>", encoding="utf-8")
+    for i in range(4, 6):
+        org = {"preFetchedData": {"organization": {"name": f"Club {i}", "summary": "Plays chess"}}}
+        (path / f"org{i}.html").write_text(
+            f"<html><body>{NAVIGATION}<script>window.initialAppState = {json.dumps(org)};</script>"
+            "</body></html>", encoding="utf-8")
+
+
+def test_dom_template_is_stripped_from_html_fallback_pages_only(tmp_path):
+    pages = tmp_path / "su_orgs"
+    pages.mkdir()
+    write_pages(pages)
+
+    boilerplate = get_su_orgs_boilerplate(str(pages), path=str(tmp_path / "template.json"))
+    assert "Navigation" in " ".join(boilerplate)
+
+    docs = {doc["id"]: doc for doc in iter_su_orgs_documents(str(pages), workers=1, boilerplate=lambda: boilerplate)}
+    assert "Navigation" not in docs["org0.html"]["text"]
+    assert docs["org0.html"]["text"] == "Rowing"
+    assert docs["org0.html"]["metadata"]["boilerplate_tokens"] > 0
+    assert docs["org4.html"]["text"].startswith("Organization: Club 4")
+    assert "boilerplate_tokens" not in docs["org4.html"]["metadata"]
@@ -0,0 +1,39 @@
+from helpers.chunking import chunk_documents
+from helpers.sync import fingerprint_metadata, get_fingerprints, sync_collection
+from helpers.vector_store import NumpyCollection
+
+
+def document(doc_id, text):
+    return {"id": doc_id, "text": text, "metadata": fingerprint_metadata(text, 0.0)}
+
+
+def test_sync_adds_changes_and_removes(tmp_path, client):
+    collection = NumpyCollection(str(tmp_path / "docs"))
+    stats = sync_collection(collection, [document("a", "alpha text"), document("b", "beta text")], client)
+    assert (stats["changed"], stats["unchanged"], stats["removed"]) == (2, 0, 0)
+
+    stats = sync_collection(collection, [document("a", "alpha text"), document("c", "gamma text")], client)
+    assert (stats["changed"], stats["unchanged"], stats["removed"]) == (1, 1, 1)
+    assert sorted(collection.get()["ids"]) == ["a", "c"]
+
+    stats = sync_collection(collection, [document("a", "alpha text, edited"), document("c", "gamma text")], client)
+    assert (stats["changed"], stats["unchanged"], stats["removed"]) == (1, 1, 0)
+    assert collection.get(ids=["a"])["documents"] == ["alpha text, edited"]
+
+
+def test_partly_written_chunked_document_is_reindexed(tmp_path, client):
+    collection = NumpyCollection(str(tmp_path / "docs"))
+    text = "\n".join(f"line {i} " + "word " * 20 for i in range(10))
+    docs = [document("page", text)]
+    sync_collection(collection, docs, client, split=lambda d: chunk_documents(d, max_tokens=30, overlap_tokens=0))
+    ids = collection.get()["ids"]
+    assert len(ids) > 2
+    assert get_fingerprints(collection)["page"]["content_hash"] is not None
+
+    # A crash between batches left only some of the chunks behind
+    collection.delete(ids=ids[1:])
+    assert get_fingerprints(collection)["page"]["content_hash"] is None
+    stats = sync_collection(collection, docs, client,
+                            split=lambda d: chunk_documents(d, max_tokens=30, overlap_tokens=0))
+    assert stats["changed"] == 1
+    assert sorted(collection.get()["ids"]) == sorted(ids)
@@ -0,0 +1,36 @@
+from helpers.tokens import count_tokens, truncate_messages_by_tokens
+
+SYSTEM = {"role": "system", "content": "Context documents: " + "facts " * 50}
+
+
+def history(n):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message number {i} " * 5} for i in range(n)]
+
+
+def tokens(*messages):
+    return sum(count_tokens(msg["content"]) for msg in messages)
+
+
+def test_system_message_is_pinned_and_newest_messages_fill_the_budget():
+    messages = [SYSTEM, *history(6)]
+    kept = truncate_messages_by_tokens(messages, tokens(SYSTEM, *messages[-2:]))
+    assert kept == [SYSTEM, *messages[-2:]]
+
+
+def test_newest_message_is_kept_even_over_budget():
+    messages = [SYSTEM, *history(3)]
+    assert truncate_messages_by_tokens(messages, 1) == [SYSTEM, messages[-1]]
+
+
+def test_without_system_message_only_history_is_trimmed():
+    messages = history(5)
+    assert truncate_messages_by_tokens(messages, tokens(*messages[-3:])) == messages[-3:]
+
+
+def test_token_cache_is_filled_once_per_message():
+    messages = [SYSTEM, *history(4)]
+    cache = {}
+    first = truncate_messages_by_tokens(messages, 10_000, cache=cache)
+    assert first == messages
+    assert len(cache) == len(messages)
+    assert truncate_messages_by_tokens(messages, 10_000, cache=cache) == first
@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pytest
+
+from helpers.vector_store import NumpyCollection, matches
+
+ROWS = [
+    ("a", [1.0, 0.0, 0.0], {"company": "Acme", "days": 10, "tag": "x"}),
+    ("b", [0.9, 0.1, 0.0], {"company": "Beta", "days": 20}),
+    ("c", [0.0, 1.0, 0.0], {"company": "Acme", "days": 30, "tag": "y"}),
+    ("d", [0.0, 0.0, 1.0], {"company": "Gamma", "days": 40, "tag": "x"}),
+]
+
+FILTERS = [
+    {"company": "Acme"},
+    {"company": {"$ne": "Acme"}},
+    {"days": {"$gte": 20, "$lt": 40}},
+    {"days": {"$gt": 15}},
+    {"company": {"$in": ["Beta", "Gamma"]}},
+    {"company": {"$nin": ["Beta", "Gamma"]}},
+    {"tag": "x"},
+    {"$and": [{"company": "Acme"}, {"days": {"$lte": 10}}]},
+    {"$or": [{"company": "Beta"}, {"tag": "y"}]},
+]
+
+
+@pytest.fixture
+def collection(tmp_path):
+    collection = NumpyCollection(str(tmp_path / "rows"))
+    collection.upsert(ids=[row[0] for row in ROWS], embeddings=[row[1] for row in ROWS],
+                      documents=[f"doc {row[0]}" for row in ROWS], metadatas=[row[2] for row in ROWS])
+    return collection
+
+
+@pytest.mark.parametrize("where", FILTERS)
+def test_get_with_where_matches_row_by_row_evaluation(collection, where):
+    expected = [doc_id for doc_id, _, meta in ROWS if matches(meta, where)]
+    assert collection.get(where=where)["ids"] == expected
+
+
+def test_query_ranks_only_rows_that_pass_the_filter(collection):
+    results = collection.query(query_embeddings=[[1.0, 0.0, 0.0]], n_results=3, where={"company": "Acme"})
+    assert results["ids"] == [["a", "c"]]
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+    assert results["distances"][0][1] == pytest.approx(1.0, abs=1e-6)
+
+
+def test_writes_are_persisted_and_filters_see_updates(collection, tmp_path):
+    collection.upsert(ids=["b"], embeddings=[[0.0, 1.0, 0.0]], documents=["doc b"],
+                      metadatas=[{"company": "Acme", "days": 50}])
+    collection.delete(where={"company": "Gamma"})
+    reopened = NumpyCollection(str(tmp_path / "rows"))
+    assert reopened.count() == 3
+    assert reopened.get(where={"company": "Acme"})["ids"] == ["a", "b", "c"]
+    assert reopened.query(query_embeddings=[[0.0, 1.0, 0.0]], n_results=1)["ids"] == [["b"]]
+
+
+def test_upserts_append_and_survive_reopening(collection, tmp_path):
+    collection.upsert(ids=["e", "a"], embeddings=[[1.0, 1.0, 0.0], [0.0, 0.0, 2.0]],
+                      documents=["doc e", "doc a v2"], metadatas=[{"company": "Delta"}, {"company": "Acme"}])
+    reopened = NumpyCollection(str(tmp_path / "rows"))
+    assert reopened.count() == 5
+    assert reopened.get(ids=["a"])["documents"] == ["doc a v2"]
+    results = reopened.query(query_embeddings=[[0.0, 0.0, 1.0]], n_results=2)
+    assert sorted(results["ids"][0]) == ["a", "d"]
+
+
+def test_delete_compacts_the_files(collection, tmp_path):
+    collection.delete(ids=["b"])
+    reopened = NumpyCollection(str(tmp_path / "rows"))
+    assert reopened.get()["ids"] == ["a", "c", "d"]
+    assert (tmp_path / "rows.f32").stat().st_size == 3 * 3 * 4
+
+
+def test_a_write_cut_short_is_dropped_on_open(collection, tmp_path):
+    collection.upsert(ids=["e"], embeddings=[[1.0, 1.0, 0.0]], documents=["doc e"], metadatas=[{}])
+    log = tmp_path / "rows.jsonl"
+    log.write_bytes(log.read_bytes()[:-5])
+    reopened = NumpyCollection(str(tmp_path / "rows"))
+    assert reopened.get()["ids"] == ["a", "b", "c", "d"]
+    assert (tmp_path / "rows.f32").stat().st_size == 4 * 3 * 4
+    reopened.upsert(ids=["e"], embeddings=[[1.0, 1.0, 0.0]], documents=["doc e"], metadatas=[{}])
+    assert NumpyCollection(str(tmp_path / "rows")).count() == 5
+
+
+def test_stores_in_the_npy_layout_are_converted(tmp_path):
+    path = tmp_path / "old"
+    np.save(f"{path}.npy", np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32))
+    (tmp_path / "old.json").write_text(json.dumps({"ids": ["x", "y"], "documents": ["dx", "dy"],
+                                                   "metadatas": [{"n": 1}, {"n": 2}]}))
+    collection = NumpyCollection(str(path))
+    assert collection.get(where={"n": 2})["documents"] == ["dy"]
+    assert not (tmp_path / "old.npy").exists() and not (tmp_path / "old.json").exists()
+    assert NumpyCollection(str(path)).query(query_embeddings=[[1.0, 0.0]], n_results=1)["ids"] == [["x"]]